@@ -0,0 +1,75 @@
+# benchmarks/bench_compression.py
+
+"""
+Сравнение форматов хранения таблиц: размер файла и скорость
+сохранения/загрузки для JSON и сжатых форматов zlib/lzma.
+
+Запуск:
+    PYTHONPATH=src python benchmarks/bench_compression.py [число_строк]
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from primitive_db.utils import load_table_data, save_table_data
+
+CITIES = ["Москва", "Казань", "Пермь", "Томск", "Омск", "Тверь", "Сочи"]
+STATUSES = ["new", "active", "blocked", "deleted"]
+
+
+def make_rows(count: int) -> list:
+    rng = random.Random(42)
+    return [
+        {
+            "ID": i,
+            "name": f"user{rng.randrange(count // 10 + 1)}",
+            "city": rng.choice(CITIES),
+            "status": rng.choice(STATUSES),
+            "age": rng.randrange(18, 90),
+            "active": rng.random() < 0.5,
+        }
+        for i in range(1, count + 1)
+    ]
+
+
+def measure(rows: list, compression: str) -> tuple:
+    table_name = f"bench_{compression}"
+    start = time.perf_counter()
+    save_table_data(table_name, rows, compression)
+    save_time = time.perf_counter() - start
+
+    path = Path("data") / (
+        f"{table_name}.json" if compression == "none" else f"{table_name}.pdb"
+    )
+    size = path.stat().st_size
+
+    start = time.perf_counter()
+    loaded = load_table_data(table_name)
+    load_time = time.perf_counter() - start
+    assert loaded == rows, "данные после загрузки отличаются"
+    return size, save_time, load_time
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    rows = make_rows(count)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        print(f"Строк: {count}")
+        print(f"{'формат':<8}{'размер, КБ':>14}{'запись, с':>12}"
+              f"{'чтение, с':>12}{'строк/с чтение':>18}")
+        for compression in ("none", "zlib", "lzma"):
+            size, save_time, load_time = measure(rows, compression)
+            print(
+                f"{compression:<8}{size / 1024:>14.1f}{save_time:>12.3f}"
+                f"{load_time:>12.3f}{count / load_time:>18.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+# benchmarks/bench_scan.py
+
+"""
+Сравнение сканирования на чистом Python и векторизованного на NumPy:
+фильтры select и агрегаты count/sum/min/max. Для каждого запроса
+выводится время на новом снимке по порядку обращений, включая сборку
+массивов NumPy. Результаты обоих путей проверяются на совпадение.
+
+Запуск:
+    PYTHONPATH=src python benchmarks/bench_scan.py [число_строк]
+"""
+
+import contextlib
+import io
+import random
+import sys
+import time
+
+from primitive_db import core, vectorized
+from primitive_db.constants import VECTORIZED_MIN_QUERIES
+
+CITIES = ["Москва", "Казань", "Пермь", "Томск", "Омск", "Тверь", "Сочи"]
+
+QUERIES = [
+    ("select where age = 42", "select", None, {"age": 42}),
+    ("select where city = Томск", "select", None, {"city": "Томск"}),
+    ("select where active = true, age = 30", "select", None,
+     {"active": True, "age": 30}),
+    ("aggregate age", "aggregate", "age", None),
+    ("aggregate score where city = Сочи", "aggregate", "score", {"city": "Сочи"}),
+    ("aggregate active where age = 50", "aggregate", "active", {"age": 50}),
+]
+
+
+def make_rows(count: int) -> list:
+    rng = random.Random(42)
+    return [
+        {
+            "ID": i,
+            "city": rng.choice(CITIES),
+            "age": rng.randrange(18, 90),
+            "score": rng.randrange(1_000_000),
+            "active": rng.random() < 0.5,
+        }
+        for i in range(1, count + 1)
+    ]
+
+
+def run(kind: str, rows: list, column, where, snapshot_key, use_numpy: bool):
+    core.clear_cache()
+    vectorized.AVAILABLE = use_numpy
+    start = time.perf_counter()
+    if kind == "select":
+        result = core.select(rows, where, snapshot_key)
+    else:
+        result = core.aggregate(rows, column, where, snapshot_key)
+    return result, time.perf_counter() - start
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000
+    if not vectorized.AVAILABLE:
+        print("NumPy не установлен: векторизованный путь недоступен.")
+        return
+
+    rows = make_rows(count)
+
+    # Каждый запрос выполняется на новом снимке (как после записи):
+    # первые запросы к снимку идут на Python, затем строятся массивы
+    # нужных столбцов - время сборки входит во время этого запроса
+    print(f"Строк: {count}")
+    header = ["Python"] + [
+        f"NumPy #{n}" for n in range(1, VECTORIZED_MIN_QUERIES + 2)
+    ]
+    print(f"{'запрос':<42}" + "".join(f"{name + ', с':>13}" for name in header))
+    for version, (title, kind, column, where) in enumerate(QUERIES, start=1):
+        snapshot_key = ("bench", version)
+        with contextlib.redirect_stdout(io.StringIO()):
+            expected, python_time = run(
+                kind, rows, column, where, snapshot_key, False
+            )
+            times = []
+            for _ in range(VECTORIZED_MIN_QUERIES + 1):
+                actual, elapsed = run(
+                    kind, rows, column, where, snapshot_key, True
+                )
+                assert actual == expected, f"результаты различаются: {title}"
+                times.append(elapsed)
+        print(
+            f"{title:<42}{python_time:>13.4f}"
+            + "".join(f"{elapsed:>13.4f}" for elapsed in times)
+        )
+    print(
+        f"NumPy #{VECTORIZED_MIN_QUERIES} включает сборку массивов столбцов "
+        "запроса, последующие запросы к снимку используют готовые массивы."
+    )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+# src/primitive_db/changelog.py
+
+"""
+Журнал изменений (CDC) для инкрементальной репликации.
+
+Каждое изменение записывается в changes.log отдельной JSON-строкой
+с монотонно растущим номером LSN:
+    {"lsn": 7, "op": "update", "table": "users", "ids": [1, 2],
+     "values": {"age": 30}}
+Изменение пишется только после того, как данные и метаданные сохранены:
+неудачная команда не оставляет записей в журнале.
+
+Операции и содержимое values:
+    create_table - {столбец: тип}; drop_table - null;
+    alter_table - описание изменения схемы;
+    insert - список добавленных строк; update - новые значения столбцов;
+    delete - null.
+
+При усечении журнала первой строкой файла пишется маркер
+{"lsn": N, "op": "truncate"}: изменения с LSN <= N удалены.
+"""
+
+import json
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from .constants import CHANGELOG_FILE, CHANGELOG_RETENTION
+from .tracing import add_counter
+from .utils import _replace_file
+
+Change = Dict[str, Any]
+
+TRUNCATE_OP = "truncate"
+
+# Последний выданный LSN и число записей в файле (читаются лениво)
+_state: Dict[str, Optional[int]] = {"last_lsn": None, "count": None}
+
+
+def _load_state() -> None:
+    """
+    Прочитать журнал и восстановить последний LSN и число записей.
+    """
+    last_lsn = 0
+    count = 0
+    if CHANGELOG_FILE.exists():
+        with CHANGELOG_FILE.open("r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                last_lsn = max(last_lsn, int(record.get("lsn", 0)))
+                if record.get("op") != TRUNCATE_OP:
+                    count += 1
+    _state["last_lsn"] = last_lsn
+    _state["count"] = count
+
+
+def last_lsn() -> int:
+    """
+    Последний записанный LSN (0, если изменений не было).
+    """
+    if _state["last_lsn"] is None:
+        _load_state()
+    return _state["last_lsn"] or 0
+
+
+def emit_change(
+        op: str,
+        table_name: str,
+        ids: Optional[List[int]] = None,
+        values: Any = None
+) -> int:
+    """
+    Дописать изменение в журнал. Возвращает его LSN.
+    """
+    lsn = last_lsn() + 1
+    record: Change = {
+        "lsn": lsn,
+        "op": op,
+        "table": table_name,
+        "ids": ids or [],
+        "values": values,
+    }
+    line = json.dumps(record, ensure_ascii=False) + "\n"
+    with CHANGELOG_FILE.open("a", encoding="utf-8") as f:
+        f.write(line)
+    add_counter("bytes_written", len(line.encode("utf-8")))
+
+    _state["last_lsn"] = lsn
+    _state["count"] = (_state["count"] or 0) + 1
+
+    # Усекаем с запасом, чтобы не переписывать файл на каждой записи
+    if CHANGELOG_RETENTION and _state["count"] > CHANGELOG_RETENTION * 11 // 10:
+        truncate_changes(lsn - CHANGELOG_RETENTION)
+    return lsn
+
+
+def iter_changes(since_lsn: int = 0) -> Iterator[Change]:
+    """
+    Потоково читать изменения с LSN больше since_lsn.
+    Если нужные изменения уже удалены усечением, выбрасывает ValueError:
+    потребителю нужна полная копия таблиц.
+    """
+    if not CHANGELOG_FILE.exists():
+        return
+
+    with CHANGELOG_FILE.open("r", encoding="utf-8") as f:
+        for line in f:
+            record = json.loads(line)
+            if record.get("op") == TRUNCATE_OP:
+                if record["lsn"] > since_lsn:
+                    raise ValueError(
+                        f"Изменения до LSN {record['lsn']} удалены из журнала. "
+                        "Требуется полная копия данных."
+                    )
+                continue
+            if record["lsn"] > since_lsn:
+                yield record
+
+
+def _truncated_lsn() -> int:
+    """
+    LSN, до которого журнал уже усечен (0, если усечения не было).
+    """
+    if not CHANGELOG_FILE.exists():
+        return 0
+    with CHANGELOG_FILE.open("r", encoding="utf-8") as f:
+        first_line = f.readline()
+    try:
+        record = json.loads(first_line)
+    except json.JSONDecodeError:
+        return 0
+    return record["lsn"] if record.get("op") == TRUNCATE_OP else 0
+
+
+def truncate_changes(upto_lsn: int) -> int:
+    """
+    Удалить из журнала изменения с LSN <= upto_lsn.
+    Возвращает число удаленных записей.
+    """
+    upto_lsn = min(upto_lsn, last_lsn())
+    if upto_lsn <= _truncated_lsn():
+        return 0
+
+    removed = 0
+    kept = 0
+
+    def write_log(tmp_path: Path) -> None:
+        nonlocal removed, kept
+        with CHANGELOG_FILE.open("r", encoding="utf-8") as src, \
+                tmp_path.open("w", encoding="utf-8") as dst:
+            marker = {"lsn": upto_lsn, "op": TRUNCATE_OP}
+            dst.write(json.dumps(marker) + "\n")
+            for line in src:
+                record = json.loads(line)
+                if record.get("op") == TRUNCATE_OP:
+                    continue
+                if record["lsn"] <= upto_lsn:
+                    removed += 1
+                else:
+                    dst.write(line)
+                    kept += 1
+
+    # Временный файл уникален для каждого вызова (см. _replace_file)
+    _replace_file(CHANGELOG_FILE, write_log)
+
+    _state["count"] = kept
+    return removed
@@ -0,0 +1,182 @@
+# src/primitive_db/compression.py
+
+"""
+Сжатый формат хранения таблиц.
+
+Структура файла:
+    MAGIC | кодек (1 байт) | длина заголовка (4 байта) | заголовок | блоки
+
+Заголовок - сжатый JSON со списком столбцов, словарями строк и таблицей
+блоков (смещение, длина, число строк). Каждый блок - сжатый JSON, где
+значения хранятся по столбцам, а значения столбцов-строк заменены номерами
+в словаре. Столбцы, которые есть не во всех строках блока (строки записаны
+по старой схеме), хранятся отдельно как пары "номер строки -> значение".
+Блоки распаковываются по одному, поэтому в памяти не держится весь
+распакованный файл.
+"""
+
+import json
+import lzma
+import struct
+import zlib
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from .constants import COMPRESSED_BLOCK_ROWS
+
+MAGIC = b"PDBZ"
+HEADER = struct.Struct(">BI")
+
+Row = Dict[str, Any]
+Codec = Tuple[int, Callable[[bytes], bytes], Callable[[bytes], bytes]]
+
+CODECS: Dict[str, Codec] = {
+    "zlib": (1, zlib.compress, zlib.decompress),
+    "lzma": (2, lzma.compress, lzma.decompress),
+}
+_CODECS_BY_ID = {codec_id: name for name, (codec_id, _, _) in CODECS.items()}
+
+
+def _dump(value: Any) -> bytes:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def _dictionary_columns(columns: List[str], data: List[Row]) -> List[str]:
+    """
+    Столбцы, все значения которых строки (или None) - их кодируем словарем.
+    """
+    result = []
+    for col in columns:
+        values = [row[col] for row in data if col in row]
+        if any(isinstance(v, str) for v in values) and all(
+            v is None or isinstance(v, str) for v in values
+        ):
+            result.append(col)
+    return result
+
+
+def encode_table(data: List[Row], codec: str) -> bytes:
+    """
+    Закодировать строки таблицы в сжатый формат.
+    """
+    codec_id, compress, _ = CODECS[codec]
+
+    columns: List[str] = list(dict.fromkeys(col for row in data for col in row))
+
+    dict_columns = _dictionary_columns(columns, data)
+    dicts: Dict[str, List[str]] = {col: [] for col in dict_columns}
+    codes: Dict[str, Dict[str, int]] = {col: {} for col in dict_columns}
+
+    def encode_value(col: str, value: Any) -> Any:
+        if col not in codes or value is None:
+            return value
+        col_codes = codes[col]
+        code = col_codes.get(value)
+        if code is None:
+            code = col_codes[value] = len(dicts[col])
+            dicts[col].append(value)
+        return code
+
+    blocks: List[bytes] = []
+    block_index: List[List[int]] = []
+    offset = 0
+    for start in range(0, len(data), COMPRESSED_BLOCK_ROWS):
+        chunk = data[start:start + COMPRESSED_BLOCK_ROWS]
+        full: Dict[str, List[Any]] = {}
+        partial: Dict[str, Dict[int, Any]] = {}
+        for col in columns:
+            if all(col in row for row in chunk):
+                full[col] = [encode_value(col, row[col]) for row in chunk]
+            else:
+                partial[col] = {
+                    i: encode_value(col, row[col])
+                    for i, row in enumerate(chunk)
+                    if col in row
+                }
+        block = compress(_dump({"rows": len(chunk), "full": full, "partial": partial}))
+        blocks.append(block)
+        block_index.append([offset, len(block), len(chunk)])
+        offset += len(block)
+
+    header = compress(_dump({
+        "columns": columns,
+        "dicts": dicts,
+        "blocks": block_index,
+    }))
+    return b"".join([MAGIC, HEADER.pack(codec_id, len(header)), header, *blocks])
+
+
+def _read_header(f: Any) -> Tuple[Callable[[bytes], bytes], Dict[str, Any], int]:
+    """
+    Прочитать заголовок файла. Возвращает функцию распаковки,
+    заголовок и смещение начала блоков.
+    """
+    if f.read(len(MAGIC)) != MAGIC:
+        raise ValueError("Файл таблицы поврежден: неизвестный формат.")
+    raw = f.read(HEADER.size)
+    if len(raw) != HEADER.size:
+        raise ValueError("Файл таблицы поврежден: заголовок обрезан.")
+    codec_id, header_len = HEADER.unpack(raw)
+    codec = _CODECS_BY_ID.get(codec_id)
+    if codec is None:
+        raise ValueError("Файл таблицы поврежден: неизвестный кодек.")
+    decompress = CODECS[codec][2]
+    raw = f.read(header_len)
+    if len(raw) != header_len:
+        raise ValueError("Файл таблицы поврежден: заголовок обрезан.")
+    header = json.loads(decompress(raw))
+    if (
+        not isinstance(header, dict)
+        or not isinstance(header.get("dicts"), dict)
+        or not isinstance(header.get("blocks"), list)
+    ):
+        raise ValueError("Файл таблицы поврежден: некорректный заголовок.")
+    return decompress, header, len(MAGIC) + HEADER.size + header_len
+
+
+def _decode_column(lookup: Optional[List[str]], values: List[Any]) -> List[Any]:
+    """
+    Заменить номера словаря на строки.
+    """
+    if lookup is None:
+        return values
+    return [lookup[v] if v is not None else None for v in values]
+
+
+def _decode_block(header: Dict[str, Any], raw: bytes) -> List[Row]:
+    """
+    Раскодировать один распакованный блок в список строк.
+    """
+    dicts: Dict[str, List[str]] = header["dicts"]
+    block = json.loads(raw)
+
+    full: Dict[str, List[Any]] = block["full"]
+    names = list(full)
+    columns = [_decode_column(dicts.get(col), full[col]) for col in names]
+    if names:
+        rows = [dict(zip(names, values)) for values in zip(*columns)]
+    else:
+        rows = [{} for _ in range(block["rows"])]
+
+    for col, values in block["partial"].items():
+        lookup = dicts.get(col)
+        for i, value in values.items():
+            if lookup is not None and value is not None:
+                value = lookup[value]
+            rows[int(i)][col] = value
+    return rows
+
+
+def iter_blocks(path: Path) -> Iterator[List[Row]]:
+    """
+    Последовательно читать блоки сжатого файла.
+    """
+    with path.open("rb") as f:
+        decompress, header, data_start = _read_header(f)
+        f.seek(data_start)
+        for _, length, _ in header["blocks"]:
+            raw = f.read(length)
+            if len(raw) != length:
+                raise ValueError("Файл таблицы поврежден: блок обрезан.")
+            yield _decode_block(header, decompress(raw))
+
@@ -1,5 +1,6 @@
 # src/primitive_db/constants.py
 
+import os
 from pathlib import Path
 
 # Допустимые типы столбцов
@@ -8,9 +9,57 @@ VALID_TYPES = {"int", "str", "bool"}
 # Файл, в котором храним описание таблиц.
 METADATA_FILE = Path("db_meta.json")
 
+# Журнал изменений (CDC) для инкрементальной репликации
+CHANGELOG_FILE = Path("changes.log")
+
+# Сколько последних изменений хранить в журнале (0 - без ограничения)
+CHANGELOG_RETENTION = 100_000
+
+# Служебный раздел db_meta.json с настройками таблиц (версия схемы и т.п.)
+TABLE_OPTIONS_KEY = "__options__"
+
 # Папка где хранятся данные таблиц
 DATA_DIR = Path("data")
 
+# Команды дольше порога (в миллисекундах) пишутся в журнал медленных запросов
+SLOW_QUERY_THRESHOLD_MS = 500
+
+# Журнал медленных запросов и параметры его ротации
+SLOW_QUERY_LOG = Path("slow_queries.log")
+SLOW_QUERY_LOG_MAX_BYTES = 1_000_000
+SLOW_QUERY_LOG_BACKUPS = 3
+
+# Сколько самых затратных мест выводит команда profile
+PROFILE_TOP = 10
+
+# Допустимые режимы сжатия файлов таблиц
+VALID_COMPRESSIONS = {"none", "zlib", "lzma"}
+
+# Число строк в одном сжатом блоке файла таблицы
+COMPRESSED_BLOCK_ROWS = 4096
+
+# Размер порции строк, для которой строится карта зон (min/max,
+# счетчики bool, фильтр Блума) для пропуска данных при сканировании
+ZONE_CHUNK_ROWS = 8192
+
+# Параметры фильтра Блума: бит на значение и число хеш-функций
+BLOOM_BITS_PER_VALUE = 10
+BLOOM_HASHES = 7
+
+# Сколько снимков таблиц держать в кеше столбцов NumPy
+VECTORIZED_CACHE_SIZE = 4
+
+# С какого по счету запроса к одному снимку строить массивы NumPy:
+# сборка массива дороже одного сканирования на Python, поэтому для
+# единственного запроса к снимку она не окупается
+VECTORIZED_MIN_QUERIES = 2
+
+# Количество строк файла, разбираемых одним воркером при массовой загрузке
+LOAD_CHUNK_ROWS = 10_000
+
+# Число процессов для разбора файла при массовой загрузке
+LOAD_WORKERS = os.cpu_count() or 1
+
 HELP_INFO = (
     "***Процесс работы с таблицей***"
     "\n"
@@ -18,6 +67,13 @@ HELP_INFO = (
     "<command> create_table <имя_таблицы> <столбец1:тип> .. - создать таблицу.\n"
     "<command> list_tables - показать список всех таблиц.\n"
     "<command> drop_table <имя_таблицы> - удалить таблицу.\n"
+    "<command> alter_table <имя_таблицы> add <столбец:тип> [default <значение>]"
+" - добавить столбец.\n"
+    "<command> alter_table <имя_таблицы> drop <столбец> - удалить столбец.\n"
+    "<command> compact <имя_таблицы> - перезаписать данные таблицы "
+"по текущей схеме.\n"
+    "<command> set_compression <имя_таблицы> <none|zlib|lzma> - "
+"выбрать формат хранения таблицы.\n"
     "\n"
     "***Операции с данными***\n"
     "Функции:\n"
@@ -26,13 +82,30 @@ HELP_INFO = (
     "<command> select from <имя_таблицы> where <столбец> = <значение> - "
 "прочитать записи по условию.\n"
     "<command> select from <имя_таблицы> - прочитать все записи.\n"
+    "<command> select from <имя_таблицы> [where ...] order by <столбец> "
+"[asc|desc] [limit <n>] - прочитать записи по порядку.\n"
+    "<command> select from <таблица1> join <таблица2> on <таблица1>.<столбец> = "
+"<таблица2>.<столбец> [where <таблица>.<столбец> = <значение>] - "
+"прочитать соединение таблиц.\n"
     "<command> update <имя_таблицы> set <столбец1> = <новое_значение1> "
 "where <столбец_условия> = <значение_условия> - обновить запись.\n"
     "<command> delete from <имя_таблицы> where <столбец> = <значение> - "
 "удалить запись.\n"
+    "<command> load <имя_таблицы> from <файл.csv|файл.jsonl> - "
+"массовая загрузка записей из файла.\n"
+    "<command> aggregate <имя_таблицы> <столбец> [where <столбец> = <значение>] - "
+"посчитать count/sum/min/max столбца.\n"
     "<command> info <имя_таблицы> - вывести информацию о таблице.\n"
+    "\n"
+    "***Журнал изменений***\n"
+    "Функции:\n"
+    "<command> changes since <lsn> - показать изменения после указанного LSN.\n"
+    "<command> truncate_changes <lsn> - удалить из журнала изменения "
+"до указанного LSN включительно.\n"
     "\n"
     "Общие команды:\n"
+    "<command> trace on|off - выводить время фаз каждой команды.\n"
+    "<command> profile <команда> - выполнить команду под профилировщиком.\n"
     "<command> exit - выход из программы.\n"
     "<command> help - справочная информация.\n"
 )
\ No newline at end of file
@@ -5,10 +5,21 @@
 """
 
 
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, Hashable, List, Optional, Tuple
 
-from .decorators import confirm_action, create_cacher, handle_db_errors, log_time
+from .constants import TABLE_OPTIONS_KEY
+from .decorators import (
+    confirm_action,
+    create_cacher,
+    handle_db_errors,
+    log_time,
+    traced,
+)
+from .tracing import add_counter
 from .utils import delete_table_data
+from .vectorized import aggregate as vectorized_aggregate
+from .vectorized import filter_rows
+from .zonemap import Zone, scan_ranges
 
 select_cache, clear_cache = create_cacher()
 
@@ -16,8 +27,10 @@ select_cache, clear_cache = create_cacher()
 Metadata = Dict[str, Dict[str, str]]
 ColumnDef = Tuple[str, str]
 Row = Dict[str, Any]
+TableOptions = Dict[str, Dict[str, Any]]
 
 @handle_db_errors
+@traced("execute")
 def create_table(
     metadata: Dict[str, Dict[str, str]],
     table_name: str,
@@ -29,6 +42,8 @@ def create_table(
     """
     if table_name in metadata:
         raise ValueError(f'Таблица "{table_name}" уже существует.')
+    if table_name == TABLE_OPTIONS_KEY:
+        raise ValueError(f'Имя "{table_name}" зарезервировано.')
 
     full_columns: List[Tuple[str, str]] = [("ID", "int"),] + columns
 
@@ -38,6 +53,7 @@ def create_table(
 
 @confirm_action("удаление таблицы")
 @handle_db_errors
+@traced("execute")
 def drop_table(metadata: Metadata, table_name: str) -> None:
     """
     Удаляем таблицу из метаданных.
@@ -49,6 +65,135 @@ def drop_table(metadata: Metadata, table_name: str) -> None:
     clear_cache()
     return metadata
 
+def _schema_options(options: TableOptions, table_name: str) -> Dict[str, Any]:
+    """
+    Вернуть (и при необходимости создать) настройки версии схемы таблицы.
+    version - текущая версия схемы, data_version - версия, по которой
+    записаны строки в файле, history - изменения схемы после data_version.
+    """
+    table_options = options.setdefault(table_name, {})
+    table_options.setdefault("version", 1)
+    table_options.setdefault("data_version", table_options["version"])
+    table_options.setdefault("history", [])
+    return table_options
+
+@handle_db_errors
+@traced("execute")
+def alter_table_add(
+        metadata: Metadata,
+        options: TableOptions,
+        table_name: str,
+        column: ColumnDef,
+        default: Any = None
+) -> Tuple[Metadata, TableOptions, int]:
+    """
+    Добавить столбец в таблицу. Меняются только метаданные: строки,
+    записанные по старой схеме, получат значение default при чтении.
+    Возвращает новую версию схемы.
+    """
+    if table_name not in metadata:
+        raise ValueError(f'Таблица "{table_name}" не существует.')
+
+    col_name, type_name = column
+    if col_name in metadata[table_name]:
+        raise ValueError(
+            f'Столбец "{col_name}" уже существует в таблице "{table_name}".'
+        )
+    if default is not None:
+        _check_value_type(col_name, type_name, default)
+
+    table_options = _schema_options(options, table_name)
+    table_options["version"] += 1
+    table_options["history"].append({
+        "version": table_options["version"],
+        "op": "add",
+        "column": col_name,
+        "default": default,
+    })
+    metadata[table_name][col_name] = type_name
+    clear_cache()
+    return metadata, options, table_options["version"]
+
+@confirm_action("удаление столбца")
+@handle_db_errors
+@traced("execute")
+def alter_table_drop(
+        metadata: Metadata,
+        options: TableOptions,
+        table_name: str,
+        col_name: str
+) -> Tuple[Metadata, TableOptions, int]:
+    """
+    Удалить столбец из таблицы. Меняются только метаданные: значения
+    столбца игнорируются при чтении и исчезнут из файла при перезаписи.
+    Возвращает новую версию схемы.
+    """
+    if table_name not in metadata:
+        raise ValueError(f'Таблица "{table_name}" не существует.')
+    if col_name == "ID":
+        raise ValueError("Столбец ID удалить нельзя.")
+    if col_name not in metadata[table_name]:
+        raise ValueError(
+            f'Столбец "{col_name}" не существует в таблице "{table_name}".'
+        )
+
+    table_options = _schema_options(options, table_name)
+    table_options["version"] += 1
+    table_options["history"].append({
+        "version": table_options["version"],
+        "op": "drop",
+        "column": col_name,
+    })
+    del metadata[table_name][col_name]
+    clear_cache()
+    return metadata, options, table_options["version"]
+
+def upgrade_rows(
+        options: TableOptions,
+        table_name: str,
+        table_data: List[Row]
+) -> List[Row]:
+    """
+    Привести строки, записанные по старой версии схемы, к текущей.
+    Если данные в файле уже актуальны, строки возвращаются как есть.
+    """
+    table_options = options.get(table_name)
+    if not table_options:
+        return table_data
+
+    data_version = table_options.get("data_version", 1)
+    if data_version >= table_options.get("version", 1):
+        return table_data
+
+    changes = [
+        change for change in table_options.get("history", [])
+        if change["version"] > data_version
+    ]
+    upgraded: List[Row] = []
+    for row in table_data:
+        new_row = dict(row)
+        for change in changes:
+            if change["op"] == "add":
+                new_row[change["column"]] = change.get("default")
+            else:
+                new_row.pop(change["column"], None)
+        upgraded.append(new_row)
+    return upgraded
+
+def mark_rows_current(options: TableOptions, table_name: str) -> bool:
+    """
+    Отметить, что строки таблицы в файле записаны по текущей схеме.
+    Возвращает True, если настройки изменились и их нужно сохранить.
+    """
+    table_options = options.get(table_name)
+    if not table_options:
+        return False
+    if table_options.get("data_version") == table_options.get("version"):
+        return False
+    table_options["data_version"] = table_options["version"]
+    table_options["history"] = []
+    return True
+
 def list_tables(metadata: Metadata) -> List[str]:
     """
     Возвращаем список всех таблиц.
@@ -67,8 +212,37 @@ def _row_matches(row: Row, where_clause: Optional[Dict[str, Any]]) -> bool:
             return False
     return True
 
+def _check_value_type(col_name: str, expected_type: str, value: Any) -> None:
+    """
+    Проверяет, что значение соответствует типу столбца.
+    """
+    if expected_type == "int" and not isinstance(value, int):
+        raise ValueError(
+            f'Некорректный тип для столбца "{col_name}": ожидается int.'
+        )
+    if expected_type == "str" and not isinstance(value, str):
+        raise ValueError(
+            f'Некорректный тип для столбца "{col_name}": ожидается str.'
+        )
+    if expected_type == "bool" and not isinstance(value, bool):
+        raise ValueError(
+            f'Некорректный тип для столбца "{col_name}": ожидается bool.'
+        )
+
+def _next_id(table_data: List[Row]) -> int:
+    """
+    Возвращает следующий свободный ID таблицы.
+    """
+    existing_ids = [
+        row.get("ID", 0)
+        for row in table_data
+        if isinstance(row.get("ID"), int)
+    ]
+    return max(existing_ids) + 1 if existing_ids else 1
+
 @log_time
 @handle_db_errors
+@traced("execute")
 def insert(
         metadata: Metadata,
         table_name: str,
@@ -77,6 +251,7 @@ def insert(
 ) -> Tuple[List[Row], int]:
     """
     Добавить новую запись в таблицу. 
+    Возвращает новый список строк, исходный не изменяется.
     """
     if table_name not in metadata:
         raise ValueError(f'Таблица "{table_name}" не существует.')
@@ -92,90 +267,156 @@ def insert(
     
     # Проверяем тип значений
     for col_name, value in zip(non_id_columns, values):
-        expected_type = schema[col_name]
-        if expected_type == "int" and not isinstance(value, int):
-            raise ValueError(
-                f'Некорректный тип для столбца "{col_name}": ожидается int.'
-            )
-        if expected_type == "str" and not isinstance(value, str):
-            raise ValueError(
-                f'Некорректный тип для столбца "{col_name}": ожидается str.'
-            )
-        if expected_type == "bool" and not isinstance(value, bool):
-            raise ValueError(
-                f'Некорректный тип для столбца "{col_name}": ожидается bool.'
-            )
+        _check_value_type(col_name, schema[col_name], value)
     
     # Генерация ID
-    if table_data:
-        existing_ids = [
-            row.get("ID", 0)
-            for row in table_data
-            if isinstance(row.get("ID"), int)
-        ]
-        new_id = (max(existing_ids) + 1 if existing_ids else 1)
-    else:
-        new_id = 1
+    new_id = _next_id(table_data)
 
     new_row: Row = {"ID": new_id}
     for col_name, value in zip(non_id_columns, values):
         new_row[col_name] = value
 
-    table_data.append(new_row)
+    # Исходный список не меняем: его могут читать по снимку
     clear_cache()
-    return table_data, new_id
+    return table_data + [new_row], new_id
 
 @log_time
 @handle_db_errors
+@traced("execute")
 def select(
         table_data: List[Row],
-        where_clause: Optional[Dict[str, Any]] = None
+        where_clause: Optional[Dict[str, Any]] = None,
+        snapshot_key: Optional[Hashable] = None,
+        zones: Optional[List[Zone]] = None
 ) -> List[Row]:
     """
     Вернуть список записей, удовлетворяющих where_clause.
     Если where_clause не задан, возвращает все записи.
+    snapshot_key - идентификатор неизменяемого снимка таблицы; если он
+    передан, кеш не хеширует содержимое строк.
+    zones - карты зон строк: порции, где совпадений быть не может,
+    пропускаются без проверки. Если установлен NumPy и передан
+    snapshot_key, условие вычисляется векторно.
     """
     key = (
         "select",
-        tuple(frozenset(row.items()) for row in table_data),
+        snapshot_key if snapshot_key is not None
+        else tuple(frozenset(row.items()) for row in table_data),
         frozenset(where_clause.items()) if where_clause else None
     )
     def compute() -> List[Row]:
         if where_clause is None:
+            add_counter("rows_scanned", len(table_data))
             return table_data.copy()
-        return[row for row in table_data if _row_matches(row, where_clause)]
+        if snapshot_key is not None:
+            # Снимок неизменяем - можно использовать кеш столбцов NumPy
+            rows = filter_rows(snapshot_key, table_data, where_clause)
+            if rows is not None:
+                add_counter("rows_scanned", len(table_data))
+                return rows
+        result: List[Row] = []
+        for start, end, may_match in scan_ranges(
+            len(table_data), where_clause, zones
+        ):
+            if may_match:
+                add_counter("rows_scanned", end - start)
+                result.extend(
+                    row for row in table_data[start:end]
+                    if _row_matches(row, where_clause)
+                )
+        return result
     
     return select_cache(key, compute)
 
+@log_time
+@handle_db_errors
+@traced("execute")
+def aggregate(
+        table_data: List[Row],
+        column: str,
+        where_clause: Optional[Dict[str, Any]] = None,
+        snapshot_key: Optional[Hashable] = None,
+        zones: Optional[List[Zone]] = None
+) -> Dict[str, Any]:
+    """
+    Посчитать count/sum/min/max непустых значений столбца в записях,
+    удовлетворяющих where_clause. sum считается только для int и bool.
+    Если установлен NumPy и передан snapshot_key, считается векторно.
+    """
+    if snapshot_key is not None:
+        result = vectorized_aggregate(
+            snapshot_key, table_data, column, where_clause
+        )
+        if result is not None:
+            add_counter("rows_scanned", len(table_data))
+            return result
+
+    values: List[Any] = []
+    for start, end, may_match in scan_ranges(len(table_data), where_clause, zones):
+        if may_match:
+            add_counter("rows_scanned", end - start)
+            values.extend(
+                row.get(column) for row in table_data[start:end]
+                if _row_matches(row, where_clause)
+            )
+    values = [value for value in values if value is not None]
+    if not values:
+        return {"count": 0, "sum": None, "min": None, "max": None}
+
+    try:
+        low, high = min(values), max(values)
+    except TypeError:
+        low = high = None
+    numeric = all(isinstance(value, int) for value in values)
+    return {
+        "count": len(values),
+        "sum": sum(values) if numeric else None,
+        "min": low,
+        "max": high,
+    }
+
 @handle_db_errors
+@traced("execute")
 def update(
         table_data: List[Row],
         set_clause: Dict[str, Any],
-        where_clause: Optional[Dict[str, Any]]
+        where_clause: Optional[Dict[str, Any]],
+        zones: Optional[List[Zone]] = None
 ) -> Tuple[List[Row], List[int]]:
     """
     Обновить записи по условию where_clause согласно set_clause.
+    Обновленные строки копируются, остальные переиспользуются:
+    исходный список и его строки не изменяются.
     """
+    new_data: List[Row] = []
     updated_ids: List[int] = []
 
-    for row in table_data:
-        if _row_matches(row, where_clause):
-            for key, value in set_clause.items():
-                if key not in row:
-                    raise ValueError(
-                        f'Столбец "{key}" не существует в таблице.'
-                    )
-                row[key] = value
-            if isinstance(row.get("ID"), int):    
-                updated_ids.append(row["ID"])
+    for start, end, may_match in scan_ranges(len(table_data), where_clause, zones):
+        if not may_match:
+            new_data.extend(table_data[start:end])
+            continue
+        add_counter("rows_scanned", end - start)
+        for row in table_data[start:end]:
+            if _row_matches(row, where_clause):
+                for key in set_clause:
+                    if key not in row:
+                        raise ValueError(
+                            f'Столбец "{key}" не существует в таблице.'
+                        )
+                row = {**row, **set_clause}
+                if isinstance(row.get("ID"), int):    
+                    updated_ids.append(row["ID"])
+            new_data.append(row)
     clear_cache()
-    return table_data, updated_ids
+    return new_data, updated_ids
 
 @confirm_action("удаление записей")
 @handle_db_errors
+@traced("execute")
 def delete(
         table_data: List[Row],
-        where_clause: Optional[Dict[str, Any]]
+        where_clause: Optional[Dict[str, Any]],
+        zones: Optional[List[Zone]] = None
 ) -> Tuple[List[Row], List[int]]:
     """
     Удаляет записи по условию where_cause.
@@ -183,11 +424,16 @@ def delete(
     remaining: List[Row] = []
     deleted_ids: List[int] = []
 
-    for row in table_data:
-        if _row_matches(row, where_clause):
-            if isinstance(row.get("ID"), int):
-                deleted_ids.append(row["ID"])
-        else:
-            remaining.append(row)
+    for start, end, may_match in scan_ranges(len(table_data), where_clause, zones):
+        if not may_match:
+            remaining.extend(table_data[start:end])
+            continue
+        add_counter("rows_scanned", end - start)
+        for row in table_data[start:end]:
+            if _row_matches(row, where_clause):
+                if isinstance(row.get("ID"), int):
+                    deleted_ids.append(row["ID"])
+            else:
+                remaining.append(row)
     clear_cache()
     return remaining, deleted_ids
@@ -6,6 +6,8 @@ import time
 from functools import wraps
 from typing import Any, Callable, Dict, Hashable, Tuple
 
+from .tracing import span
+
 Func = Callable[..., Any]
 
 def handle_db_errors(func: Func) -> Func:
@@ -63,6 +65,20 @@ def log_time(func: Func) -> Func:
 
     return wrapper
 
+def traced(phase: str) -> Callable[[Func], Func]:
+    """
+    Относит время выполнения функции к фазе трассировки команды.
+    """
+    def decorator(func: Func) -> Func:
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(phase):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
 def create_cacher() -> Tuple[
     Callable[[Hashable, Callable[[], Any]], Any],
     Callable[[], None]
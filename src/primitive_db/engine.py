@@ -4,30 +4,58 @@
 Командный интерфейс для работы с примитивной базой данных.
 """
 
+import json
 import re
 import shlex
-from typing import Any, Dict, List, Optional
+from itertools import islice
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
 from prettytable import PrettyTable
 from prompt import string
 
-from .constants import HELP_INFO
+from .changelog import emit_change, iter_changes, truncate_changes
+from .constants import HELP_INFO, LOAD_CHUNK_ROWS, VALID_COMPRESSIONS
 from .core import (
+    aggregate,
+    alter_table_add,
+    alter_table_drop,
     create_table,
     delete,
     drop_table,
     insert,
     list_tables,
+    mark_rows_current,
     select,
     update,
 )
+from .decorators import handle_db_errors, traced
+from .join import hash_join
+from .loader import bulk_load
 from .parser import (
     _parse_column_defs,
+    _parse_join,
+    _parse_limit,
+    _parse_order_by,
     _parse_set_clause,
+    _parse_value,
     _parse_values_list,
     _parse_where_clause,
 )
-from .utils import load_metadata, load_table_data, save_metadata, save_table_data
+from .snapshot import (
+    Snapshot,
+    invalidate_snapshot,
+    pin_snapshot,
+    publish_snapshot,
+)
+from .sorting import order_rows
+from .tracing import (
+    finish_trace,
+    profile_statement,
+    set_inline,
+    span,
+    start_trace,
+)
+from .utils import load_metadata, load_table_options, save_metadata
 
 
 def _print_help() -> None:
@@ -39,7 +67,7 @@ def _print_help() -> None:
 def _print_table(
         table_name: str,
         metadata: Dict[str, Dict[str, str]],
-        rows: List[Dict[str, Any]]
+        rows: Iterable[Dict[str, Any]]
 ) -> None:
     """
     Красиво вывести записи таблицы с помощью PrettyTable.
@@ -48,125 +76,354 @@ def _print_table(
         print(f'Ошибка: Таблица "{table_name}" не существует.')
         return
     
-    if not rows:
-        print("Записей не найдено.")
-        return
-    
-    columns = list(metadata[table_name].keys())
+    _print_rows(list(metadata[table_name].keys()), rows)
+
+@traced("render")
+def _print_rows(columns: List[str], rows: Iterable[Dict[str, Any]]) -> None:
+    """
+    Вывести строки с заданными столбцами с помощью PrettyTable.
+    """
     table = PrettyTable()
     table.field_names = columns
 
     for row in rows:
         table.add_row([row.get(col) for col in columns])
 
+    if not table.rows:
+        print("Записей не найдено.")
+        return
+
     print(table)
 
+def _select_join(
+        metadata: Dict[str, Dict[str, str]],
+        options: Dict[str, Dict[str, Any]],
+        join: Tuple[str, str, str, str],
+        where_clause: Optional[Dict[str, Any]],
+        order_by: Optional[Tuple[str, bool]],
+        limit: Optional[int]
+) -> None:
+    """
+    Выполнить и вывести select с соединением двух таблиц.
+    """
+    left_name, right_name, left_col, right_col = join
+    for table_name, col in ((left_name, left_col), (right_name, right_col)):
+        if table_name not in metadata:
+            print(f'Ошибка: Таблица "{table_name}" не существует.')
+            return
+        if col not in metadata[table_name]:
+            print(
+                f'Ошибка: Столбец "{col}" не существует '
+                f'в таблице "{table_name}".'
+            )
+            return
+
+    columns = [
+        f"{table_name}.{col}"
+        for table_name in (left_name, right_name)
+        for col in metadata[table_name]
+    ]
+    referenced = list(where_clause or {})
+    if order_by is not None:
+        referenced.append(order_by[0])
+    for col in referenced:
+        if col not in columns:
+            print(
+                f'Ошибка: Столбец "{col}" не найден. '
+                "Используйте имена вида <таблица>.<столбец>."
+            )
+            return
+
+    # Обе стороны читаются из снимков, закрепленных на всю команду
+    left = pin_snapshot(options, left_name)
+    right = pin_snapshot(options, right_name)
+    # Результат вычисляется целиком до вывода, чтобы время соединения
+    # и сортировки попало в фазу execute, а не render
+    with span("execute"):
+        rows: Iterable[Dict[str, Any]] = hash_join(
+            left_name,
+            list(left.rows),
+            left_col,
+            right_name,
+            list(right.rows),
+            right_col,
+            where_clause,
+        )
+        if order_by is not None:
+            rows = order_rows(rows, order_by[0], order_by[1], limit)
+        elif limit is not None:
+            rows = islice(rows, limit)
+        rows = list(rows)
+
+    _print_rows(columns, rows)
 
-def run() -> None:
+@handle_db_errors
+def _save_table(
+        metadata: Dict[str, Dict[str, str]],
+        options: Dict[str, Dict[str, Any]],
+        table_name: str,
+        table_data: List[Dict[str, Any]],
+        base: Snapshot
+) -> bool:
     """
-    Запуск основного цикла работы с бд.
+    Сохранить строки таблицы, вычисленные из снимка base, как новую версию.
+    Строки всегда записываются по текущей схеме, поэтому после записи
+    отложенные изменения схемы сбрасываются.
+    Если таблицу успели изменить, выводит ошибку и возвращает None.
     """
-    metadata = load_metadata()
+    compression = options.get(table_name, {}).get("compression")
+    publish_snapshot(options, table_name, table_data, base, compression)
+    if mark_rows_current(options, table_name):
+        save_metadata(metadata, options)
+    return True
 
-    print("***База данных***\n")
-    _print_help()
 
-    while True:
-        try:
-            raw_input_line = string(">>>Введите команду: ").strip()
-        except (EOFError, KeyboardInterrupt):
-            print()
-            break
+def _execute(
+        raw_input_line: str,
+        metadata: Dict[str, Dict[str, str]],
+        options: Dict[str, Dict[str, Any]]
+) -> bool:
+    """
+    Выполнить одну команду. Возвращает False, если нужно завершить работу.
+    metadata и options изменяются на месте.
+    """
+    if not raw_input_line:
+        return True
 
-        if not raw_input_line:
-            continue
-        
-        lower = raw_input_line.lower()
-        try:
+    lower = raw_input_line.lower()
+    try:
+        with span("parse"):
             parts = shlex.split(raw_input_line)
-        except ValueError as exc:
-            print(f"Ошибка разбора команды: {exc}")
-            continue
+    except ValueError as exc:
+        print(f"Ошибка разбора команды: {exc}")
+        return True
 
-        if not parts:
-            continue
+    if not parts:
+        return True
 
-        command = parts[0]
+    command = parts[0]
 
-        #exit
-        if command == "exit":
-            break
+    #exit
+    if command == "exit":
+        return False
 
-        #help
-        if command == "help":
-            _print_help()
-            continue
-        
-        #list_tables
-        if command == "list_tables":
-            tables = list_tables(metadata)
-            if not tables:
-                print("Таблиц пока нет.")
-            else:
-                for name in tables:
-                    print(f"- {name}")
-            continue
-        #create_table
-        if command == "create_table":
-            if len(parts) < 3:
-                print(
-                    "Ошибка: недостаточно аргументов.\n"
-                    "Формат: create_table <имя_таблицы> <столбец:тип> ..."
-                )
-                continue
+    #help
+    if command == "help":
+        _print_help()
+        return True
+
+    #trace on|off
+    if command == "trace":
+        if len(parts) != 2 or parts[1].lower() not in ("on", "off"):
+            print(
+                "Ошибка: некорректные аргументы.\n"
+                "Формат: trace on|off"
+            )
+            return True
+        set_inline(parts[1].lower() == "on")
+        state = "включена" if parts[1].lower() == "on" else "выключена"
+        print(f"Трассировка команд {state}.")
+        return True
+
+    #profile <команда>
+    if command == "profile":
+        statement = raw_input_line[len("profile"):].strip()
+        if not statement:
+            print(
+                "Ошибка: не указана команда.\n"
+                "Формат: profile <команда>"
+            )
+            return True
+        return profile_statement(
+            lambda: _execute(statement, metadata, options)
+        )
+
+    #list_tables
+    if command == "list_tables":
+        tables = list_tables(metadata)
+        if not tables:
+            print("Таблиц пока нет.")
+        else:
+            for name in tables:
+                print(f"- {name}")
+        return True
+    #create_table
+    if command == "create_table":
+        if len(parts) < 3:
+            print(
+                "Ошибка: недостаточно аргументов.\n"
+                "Формат: create_table <имя_таблицы> <столбец:тип> ..."
+            )
+            return True
 
-            table_name = parts[1]
-            raw_columns = parts[2:]
+        table_name = parts[1]
+        raw_columns = parts[2:]
 
-            try:
+        try:
+            with span("parse"):
                 columns = _parse_column_defs(raw_columns)
-            except ValueError as exc:
-                print(f"Ошибка: {exc}")
-                continue
+        except ValueError as exc:
+            print(f"Ошибка: {exc}")
+            return True
 
-            result = create_table(metadata, table_name, columns)
-            if result is None:
-                continue
-            
-            metadata, full_columns = result
+        result = create_table(metadata, table_name, columns)
+        if result is None:
+            return True
+    
+        metadata, full_columns = result
+        options.pop(table_name, None)
 
-            save_metadata(metadata)
+        save_metadata(metadata, options)
+        emit_change("create_table", table_name, values=metadata[table_name])
 
-            cols_str = ", ".join(
-                f"{name}:{type_name}" for name, type_name in full_columns
-            )
+        cols_str = ", ".join(
+            f"{name}:{type_name}" for name, type_name in full_columns
+        )
+        print(
+            f'Таблица "{table_name}" успешно создана '
+            f"со столбцами: {cols_str}"
+        )
+        return True
+
+    #drop_table
+    if command == "drop_table":
+        if len(parts) != 2:
             print(
-                f'Таблица "{table_name}" успешно создана '
-                f"со столбцами: {cols_str}"
+                "Ошибка: некорректное число аргументов.\n"
+                "Формат: drop_table <имя_таблицы>"
             )
-            continue
-        
-        #drop_table
-        if command == "drop_table":
-            if len(parts) != 2:
-                print(
-                    "Ошибка: некорректное число аргументов.\n"
-                    "Формат: drop_table <имя_таблицы>"
-                )
-                continue
-            table_name = parts[1]
+            return True
+        table_name = parts[1]
+
+        result = drop_table(metadata, table_name)
+        if result is None:
+            return True
+
+        options.pop(table_name, None)
+        invalidate_snapshot(table_name)
+        save_metadata(metadata, options)
+        emit_change("drop_table", table_name)
+        print(f'Таблица "{table_name}" успешно удалена.')
+        return True
+
+    #alter_table <table> add|drop
+    if command == "alter_table":
+        action = parts[2].lower() if len(parts) > 2 else ""
+        try:
+            with span("parse"):
+                if action == "add" and len(parts) >= 4:
+                    columns = _parse_column_defs([parts[3]])
+                    default = None
+                    if len(parts) > 4:
+                        default_index = lower.find(" default ")
+                        if parts[4].lower() != "default" or default_index == -1:
+                            raise ValueError(
+                                "Ожидается: default <значение>."
+                            )
+                        default = _parse_value(
+                            raw_input_line[default_index + len(" default "):]
+                        )
+                elif action == "drop" and len(parts) == 4:
+                    columns = []
+                else:
+                    raise ValueError(
+                        "Некорректная команда alter_table.\n"
+                        "Формат: alter_table <имя_таблицы> add <столбец:тип> "
+                        "[default <значение>] | "
+                        "alter_table <имя_таблицы> drop <столбец>"
+                    )
+        except ValueError as exc:
+            print(f"Ошибка: {exc}")
+            return True
 
-            result = drop_table(metadata, table_name)
-            if result is None:
-                continue
+        table_name = parts[1]
+        if action == "add":
+            result = alter_table_add(
+                metadata, options, table_name, columns[0], default
+            )
+        else:
+            result = alter_table_drop(metadata, options, table_name, parts[3])
+        if result is None:
+            return True
+
+        metadata, options, version = result
+        save_metadata(metadata, options)
+        if action == "add":
+            col_name, type_name = columns[0]
+            change = {
+                "action": "add",
+                "column": col_name,
+                "type": type_name,
+                "default": default,
+            }
+        else:
+            change = {"action": "drop", "column": parts[3]}
+        emit_change("alter_table", table_name, values=change)
+        print(
+            f'Схема таблицы "{table_name}" изменена, '
+            f"текущая версия схемы: {version}."
+        )
+        return True
 
-            save_metadata(metadata)
-            print(f'Таблица "{table_name}" успешно удалена.')
-            continue
-        
-        #insert into <table> values
-        if lower.startswith("insert into "):
-            try:
+    #compact <table>
+    if command == "compact":
+        if len(parts) != 2:
+            print(
+                "Ошибка: некорректное число аргументов.\n"
+                "Формат: compact <имя_таблицы>"
+            )
+            return True
+        table_name = parts[1]
+
+        if table_name not in metadata:
+            print(f'Ошибка: Таблица "{table_name}" не существует.')
+            return True
+
+        snapshot = pin_snapshot(options, table_name)
+        if not _save_table(
+            metadata, options, table_name, list(snapshot.rows), snapshot
+        ):
+            return True
+        print(f'Данные таблицы "{table_name}" перезаписаны по текущей схеме.')
+        return True
+
+    #set_compression <table> <none|zlib|lzma>
+    if command == "set_compression":
+        if len(parts) != 3 or parts[2] not in VALID_COMPRESSIONS:
+            print(
+                "Ошибка: некорректные аргументы.\n"
+                "Формат: set_compression <имя_таблицы> "
+                f"<{'|'.join(sorted(VALID_COMPRESSIONS))}>"
+            )
+            return True
+        table_name, compression = parts[1], parts[2]
+
+        if table_name not in metadata:
+            print(f'Ошибка: Таблица "{table_name}" не существует.')
+            return True
+
+        snapshot = pin_snapshot(options, table_name)
+        table_options = options.setdefault(table_name, {})
+        previous = table_options.get("compression")
+        table_options["compression"] = compression
+        if not _save_table(
+            metadata, options, table_name, list(snapshot.rows), snapshot
+        ):
+            if previous is None:
+                table_options.pop("compression")
+            else:
+                table_options["compression"] = previous
+            return True
+        save_metadata(metadata, options)
+        print(
+            f'Таблица "{table_name}" хранится в формате: {compression}.'
+        )
+        return True
+
+    #insert into <table> values
+    if lower.startswith("insert into "):
+        try:
+            with span("parse"):
                 match = re.search(r"\bvalues\b", lower)
                 if not match:
                     raise ValueError(
@@ -184,63 +441,111 @@ def run() -> None:
                     )
                 inner = values_part[1:-1]
                 values = _parse_values_list(inner)
-            except ValueError as exc:
-                print(f"Ошибка: {exc}")
-                continue
+        except ValueError as exc:
+            print(f"Ошибка: {exc}")
+            return True
 
-            if table_name not in metadata:
-                print(f'Ошибка: Таблица "{table_name}" не существует.')
-                continue
+        if table_name not in metadata:
+            print(f'Ошибка: Таблица "{table_name}" не существует.')
+            return True
 
-            table_data = load_table_data(table_name)
-            result = insert(metadata, table_name, table_data, values)
-            if result is None:
-                continue
+        snapshot = pin_snapshot(options, table_name)
+        result = insert(metadata, table_name, list(snapshot.rows), values)
+        if result is None:
+            return True
 
-            table_data, new_id = result
-            save_table_data(table_name, table_data)
+        table_data, new_id = result
+        if not _save_table(metadata, options, table_name, table_data, snapshot):
+            return True
+        emit_change("insert", table_name, [new_id], [table_data[-1]])
 
-            print(
-                f'Запись с ID={new_id} успешно добавлена в таблицу "{table_name}".'
-            )
-            continue
+        print(
+            f'Запись с ID={new_id} успешно добавлена в таблицу "{table_name}".'
+        )
+        return True
 
-        # select from <table>
-        if lower.startswith("select from "):
-            try:
-                where_index = lower.find(" where ")
+    # select from <table>
+    if lower.startswith("select from "):
+        statement, statement_lower = raw_input_line, lower
+        order_by: Optional[Tuple[str, bool]] = None
+        limit: Optional[int] = None
+        try:
+            with span("parse"):
+                limit_index = statement_lower.rfind(" limit ")
+                if limit_index != -1:
+                    limit = _parse_limit(
+                        statement[limit_index + len(" limit "):]
+                    )
+                    statement = statement[:limit_index]
+                    statement_lower = statement_lower[:limit_index]
+
+                order_index = statement_lower.rfind(" order by ")
+                if order_index != -1:
+                    order_by = _parse_order_by(
+                        statement[order_index + len(" order by "):]
+                    )
+                    statement = statement[:order_index]
+                    statement_lower = statement_lower[:order_index]
+
+                where_index = statement_lower.find(" where ")
                 if where_index == -1:
-                    table_name = raw_input_line[len("select from "):].strip()
+                    table_name = statement[len("select from "):].strip()
                     where_clause: Optional[Dict[str, Any]] = None
                 else:
-                    table_name = raw_input_line[
+                    table_name = statement[
                         len("select from "):where_index
                     ].strip()
-                    where_text = raw_input_line[
+                    where_text = statement[
                         where_index + len(" where "):
                     ].strip()
                     where_clause = _parse_where_clause(where_text)
-            except ValueError as exc:
-                print(f"Ошибка: {exc}")
-                continue
-
-            if table_name not in metadata:
-                print(f'Ошибка: Таблица "{table_name}" не существует.')
-                continue
-
-            table_data = load_table_data(table_name)
-            rows = select(table_data, where_clause)
-
-            if rows is None:
-                print("Записей не найдено.")
-                continue
-            
-            _print_table(table_name, metadata, rows)
-            continue
-        
-        #update <table> set
-        if lower.startswith("update "):
-            try:
+                join = _parse_join(table_name)
+        except ValueError as exc:
+            print(f"Ошибка: {exc}")
+            return True
+
+        if join is not None:
+            _select_join(metadata, options, join, where_clause, order_by, limit)
+            return True
+
+        if table_name not in metadata:
+            print(f'Ошибка: Таблица "{table_name}" не существует.')
+            return True
+
+        if order_by is not None and order_by[0] not in metadata[table_name]:
+            print(
+                f'Ошибка: Столбец "{order_by[0]}" не существует '
+                f'в таблице "{table_name}".'
+            )
+            return True
+
+        # Снимок закреплен на всю команду: запись создаст новую версию
+        snapshot = pin_snapshot(options, table_name)
+        rows = select(
+            list(snapshot.rows),
+            where_clause,
+            (table_name, snapshot.version),
+            snapshot.zones,
+        )
+
+        if rows is None:
+            print("Записей не найдено.")
+            return True
+
+        with span("execute"):
+            if order_by is not None:
+                order_column, descending = order_by
+                rows = list(order_rows(rows, order_column, descending, limit))
+            elif limit is not None:
+                rows = rows[:limit]
+    
+        _print_table(table_name, metadata, rows)
+        return True
+
+    #update <table> set
+    if lower.startswith("update "):
+        try:
+            with span("parse"):
                 set_index = lower.find(" set ")
                 where_index = lower.find(" where ")
                 if set_index == -1 or where_index == -1 or where_index < set_index:
@@ -248,7 +553,7 @@ def run() -> None:
                         "Некорректная кманда update. "
                         "Ожидается: update <имя_таблицы> set ... where ... ."
                     )
-                
+        
                 table_name = raw_input_line[len("update "):set_index].strip()
                 set_text = raw_input_line[
                     set_index + len(" set "):where_index
@@ -259,34 +564,43 @@ def run() -> None:
 
                 set_clause = _parse_set_clause(set_text)
                 where_clause = _parse_where_clause(where_text)
-            except ValueError as exc:
-                print(f"Ошибка: {exc}")
-                continue
-                
-            if table_name not in metadata:
-                print(f'Ошибка: Таблица "{table_name}" не существует.')
-                continue
-
-            table_data = load_table_data(table_name)
-            result = update(table_data,  set_clause, where_clause)
-            if result is None:
-                continue
-            table_data, updated_ids = result
-            save_table_data(table_name, table_data)
-
-            if not updated_ids:
-                print("Под походящее условие не попала ни одна запись.")
-            else:
-                for rec_id in updated_ids:
-                    print(
-                        f'Запись с ID={rec_id} в таблце "{table_name}" '
-                        f'успешно обновлена'
-                    )
-            continue
+        except ValueError as exc:
+            print(f"Ошибка: {exc}")
+            return True
+        
+        if table_name not in metadata:
+            print(f'Ошибка: Таблица "{table_name}" не существует.')
+            return True
+
+        snapshot = pin_snapshot(options, table_name)
+        result = update(
+            list(snapshot.rows),
+            set_clause,
+            where_clause,
+            snapshot.zones,
+        )
+        if result is None:
+            return True
+        table_data, updated_ids = result
+        if not _save_table(metadata, options, table_name, table_data, snapshot):
+            return True
+        if updated_ids:
+            emit_change("update", table_name, updated_ids, set_clause)
+
+        if not updated_ids:
+            print("Под походящее условие не попала ни одна запись.")
+        else:
+            for rec_id in updated_ids:
+                print(
+                    f'Запись с ID={rec_id} в таблце "{table_name}" '
+                    f'успешно обновлена'
+                )
+        return True
 
-        #delete from <table> where
-        if lower.startswith("delete from "):
-            try:
+    #delete from <table> where
+    if lower.startswith("delete from "):
+        try:
+            with span("parse"):
                 where_index = lower.find(" where ")
                 if where_index == -1:
                     raise ValueError(
@@ -294,62 +608,237 @@ def run() -> None:
                         "Ожидается: delete from <имя_таблицы> where "
                         "<столбец> = <значение>."
                     )
-                
+        
                 table_name = raw_input_line[len("delete from "):where_index].strip()
                 where_text = raw_input_line[
                     where_index + len(" where "):
                 ].strip()
                 where_clause = _parse_where_clause(where_text)
-            except ValueError as exc:
-                print(f"Ошибка: {exc}")
-                continue
+        except ValueError as exc:
+            print(f"Ошибка: {exc}")
+            return True
 
-            if table_name not in metadata:
-                print(f'Ошибка: Таблица "{table_name}" не существует.')
-                continue
+        if table_name not in metadata:
+            print(f'Ошибка: Таблица "{table_name}" не существует.')
+            return True
 
-            table_data = load_table_data(table_name)
+        snapshot = pin_snapshot(options, table_name)
 
-            result = delete(table_data, where_clause)
-            if result is None:
-                continue
+        result = delete(
+            list(snapshot.rows), where_clause, snapshot.zones
+        )
+        if result is None:
+            return True
+
+        new_data, deleted_ids = result
+        if not _save_table(metadata, options, table_name, new_data, snapshot):
+            return True
+        if deleted_ids:
+            emit_change("delete", table_name, deleted_ids)
+
+        if not deleted_ids:
+            print("Под подходящее условие не попала и одна запись.")
+        else:
+            for rec_id in deleted_ids:
+                print(
+                    f'Запись с ID={rec_id} успешно удалена из таблицы '
+                    f'"{table_name}".'
+                )
+        return True
 
-            new_data, deleted_ids = result
-            save_table_data(table_name, new_data)
+    #load <table> from <file>
+    if command == "load":
+        if len(parts) != 4 or parts[2].lower() != "from":
+            print(
+                "Ошибка: некорректное число аргументов.\n"
+                "Формат: load <имя_таблицы> from <файл.csv|файл.jsonl>"
+            )
+            return True
+        table_name, file_path = parts[1], parts[3]
+
+        if table_name not in metadata:
+            print(f'Ошибка: Таблица "{table_name}" не существует.')
+            return True
+
+        snapshot = pin_snapshot(options, table_name)
+        result = bulk_load(metadata, table_name, list(snapshot.rows), file_path)
+        if result is None:
+            return True
+
+        table_data, accepted, rejected, rejected_path = result
+        if not _save_table(metadata, options, table_name, table_data, snapshot):
+            return True
+        # Загруженные строки добавлены в конец; в журнал пишем пачками
+        new_rows = table_data[len(table_data) - accepted:]
+        for start in range(0, accepted, LOAD_CHUNK_ROWS):
+            batch = new_rows[start:start + LOAD_CHUNK_ROWS]
+            emit_change(
+                "insert", table_name, [row["ID"] for row in batch], batch
+            )
 
-            if not deleted_ids:
-                print("Под подходящее условие не попала и одна запись.")
-            else:
-                for rec_id in deleted_ids:
-                    print(
-                        f'Запись с ID={rec_id} успешно удалена из таблицы '
-                        f'"{table_name}".'
+        print(
+            f'В таблицу "{table_name}" загружено записей: {accepted}.'
+        )
+        if rejected_path is not None:
+            print(
+                f"Отклонено строк: {rejected}. "
+                f"Подробности в файле {rejected_path}."
+            )
+        return True
+
+    #changes since <lsn>
+    if command == "changes":
+        try:
+            if (
+                len(parts) != 3
+                or parts[1].lower() != "since"
+                or not parts[2].isdigit()
+            ):
+                raise ValueError(
+                    "Некорректная команда changes.\n"
+                    "Формат: changes since <lsn>"
+                )
+            since_lsn = int(parts[2])
+            found = False
+            for change in iter_changes(since_lsn):
+                found = True
+                print(json.dumps(change, ensure_ascii=False))
+        except ValueError as exc:
+            print(f"Ошибка: {exc}")
+            return True
+
+        if not found:
+            print(f"Изменений после LSN={since_lsn} нет.")
+        return True
+
+    #truncate_changes <lsn>
+    if command == "truncate_changes":
+        if len(parts) != 2 or not parts[1].isdigit():
+            print(
+                "Ошибка: некорректные аргументы.\n"
+                "Формат: truncate_changes <lsn>"
+            )
+            return True
+
+        removed = truncate_changes(int(parts[1]))
+        print(f"Из журнала удалено изменений: {removed}.")
+        return True
+
+    #aggregate <table> <column> [where]
+    if command == "aggregate":
+        try:
+            with span("parse"):
+                where_index = lower.find(" where ")
+                head = raw_input_line if where_index == -1 else (
+                    raw_input_line[:where_index]
+                )
+                head_parts = head.split()
+                if len(head_parts) != 3:
+                    raise ValueError(
+                        "Некорректная команда aggregate. Ожидается: "
+                        "aggregate <имя_таблицы> <столбец> "
+                        "[where <столбец> = <значение>]."
                     )
-            continue
-        
-        # info <table>
-        if lower.startswith("info "):
-            table_name = raw_input_line[len("info "):].strip()
-            if not table_name:
-                print("Ошибка: не указано имя таблицы.")
-                continue
-
-            if table_name not in metadata:
-                print(f'Ошибка: Таблица "{table_name}" не существует.')
-                continue
-
-            columns = metadata[table_name]
-            cols_str = ", ".join(
-                f"{name}:{col_type}" for name, col_type in columns.items()
+                table_name, column = head_parts[1], head_parts[2]
+                where_clause = None
+                if where_index != -1:
+                    where_clause = _parse_where_clause(
+                        raw_input_line[where_index + len(" where "):].strip()
+                    )
+        except ValueError as exc:
+            print(f"Ошибка: {exc}")
+            return True
+
+        if table_name not in metadata:
+            print(f'Ошибка: Таблица "{table_name}" не существует.')
+            return True
+        if column not in metadata[table_name]:
+            print(
+                f'Ошибка: Столбец "{column}" не существует '
+                f'в таблице "{table_name}".'
             )
-            table_data = load_table_data(table_name)
-            print(f"Таблица: {table_name}")
-            print(f"Столбцы: {cols_str}")
-            print(f"Количество записей: {len(table_data)}")
+            return True
+
+        snapshot = pin_snapshot(options, table_name)
+        result = aggregate(
+            list(snapshot.rows),
+            column,
+            where_clause,
+            (table_name, snapshot.version),
+            snapshot.zones,
+        )
+        if result is None:
+            return True
+
+        _print_rows(["count", "sum", "min", "max"], [result])
+        return True
+
+    # info <table>
+    if lower.startswith("info "):
+        table_name = raw_input_line[len("info "):].strip()
+        if not table_name:
+            print("Ошибка: не указано имя таблицы.")
+            return True
+
+        if table_name not in metadata:
+            print(f'Ошибка: Таблица "{table_name}" не существует.')
+            return True
+
+        columns = metadata[table_name]
+        cols_str = ", ".join(
+            f"{name}:{col_type}" for name, col_type in columns.items()
+        )
+        snapshot = pin_snapshot(options, table_name)
+        table_options = options.get(table_name, {})
+        print(f"Таблица: {table_name}")
+        print(f"Столбцы: {cols_str}")
+        print(f"Версия схемы: {table_options.get('version', 1)}")
+        print(f"Сжатие: {table_options.get('compression', 'none')}")
+        print(f"Количество записей: {len(snapshot.rows)}")
+        return True
+
+    #unknown_command
+    print(
+        "Ошибка: неизвестная команда.\n"
+        'Введите "help" для просмотра доступных команд.'
+    )
+    return True
+
+def _run_statement(
+        raw_input_line: str,
+        metadata: Dict[str, Dict[str, str]],
+        options: Dict[str, Dict[str, Any]]
+) -> bool:
+    """
+    Выполнить команду внутри трассы: время делится по фазам,
+    медленные команды попадают в журнал медленных запросов.
+    """
+    trace = start_trace(raw_input_line)
+    try:
+        return _execute(raw_input_line, metadata, options)
+    finally:
+        finish_trace(trace)
+
+
+def run() -> None:
+    """
+    Запуск основного цикла работы с бд.
+    """
+    metadata = load_metadata()
+    options = load_table_options()
+
+    print("***База данных***\n")
+    _print_help()
+
+    while True:
+        try:
+            raw_input_line = string(">>>Введите команду: ").strip()
+        except (EOFError, KeyboardInterrupt):
+            print()
+            break
+
+        if not raw_input_line:
             continue
 
-        #unknown_command
-        print(
-            "Ошибка: неизвестная команда.\n"
-            'Введите "help" для просмотра доступных команд.'
-        )
+        if not _run_statement(raw_input_line, metadata, options):
+            break
@@ -0,0 +1,100 @@
+# src/primitive_db/join.py
+
+"""
+Хеш-соединение таблиц (select from a join b on a.col = b.col).
+
+Хеш-таблица строится по меньшей таблице, строки большей проходят через
+нее потоком. Обе таблицы уже целиком в памяти (строки берутся из
+снимков), а хеш-таблица хранит только ссылки на строки, поэтому
+разбиение на разделы во временных файлах не уменьшило бы память.
+"""
+
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from .core import _row_matches
+from .tracing import add_counter
+
+Row = Dict[str, Any]
+
+
+def _qualify(table_name: str, row: Row) -> Row:
+    return {f"{table_name}.{col}": value for col, value in row.items()}
+
+
+def split_where(
+        where_clause: Optional[Dict[str, Any]],
+        table_name: str
+) -> Optional[Dict[str, Any]]:
+    """
+    Выделить из условия where часть, относящуюся к одной таблице,
+    чтобы отфильтровать ее строки до соединения.
+    """
+    if not where_clause:
+        return None
+    prefix = f"{table_name}."
+    return {
+        key[len(prefix):]: value
+        for key, value in where_clause.items()
+        if key.startswith(prefix)
+    } or None
+
+
+def _probe(
+        build_rows: Iterable[Row],
+        build_col: str,
+        probe_rows: Iterable[Row],
+        probe_col: str
+) -> Iterator[tuple]:
+    """
+    Соединение в памяти: возвращает пары (строка build, строка probe).
+    Значения None не соединяются ни с чем.
+    """
+    table: Dict[Any, List[Row]] = {}
+    for row in build_rows:
+        key = row.get(build_col)
+        if key is not None:
+            table.setdefault(key, []).append(row)
+
+    for row in probe_rows:
+        key = row.get(probe_col)
+        if key is None:
+            continue
+        for match in table.get(key, ()):
+            yield match, row
+
+
+def hash_join(
+        left_name: str,
+        left_rows: List[Row],
+        left_col: str,
+        right_name: str,
+        right_rows: List[Row],
+        right_col: str,
+        where_clause: Optional[Dict[str, Any]] = None
+) -> Iterator[Row]:
+    """
+    Соединить строки двух таблиц по равенству столбцов.
+    Столбцы результата имеют вид "<таблица>.<столбец>".
+    Условие where на столбцы одной таблицы применяется до соединения.
+    """
+    add_counter("rows_scanned", len(left_rows) + len(right_rows))
+    left_where = split_where(where_clause, left_name)
+    right_where = split_where(where_clause, right_name)
+    if left_where:
+        left_rows = [row for row in left_rows if _row_matches(row, left_where)]
+    if right_where:
+        right_rows = [row for row in right_rows if _row_matches(row, right_where)]
+
+    build_left = len(left_rows) <= len(right_rows)
+    if build_left:
+        build, build_col, probe, probe_col = left_rows, left_col, right_rows, right_col
+    else:
+        build, build_col, probe, probe_col = right_rows, right_col, left_rows, left_col
+
+    for build_row, probe_row in _probe(build, build_col, probe, probe_col):
+        left_row, right_row = (
+            (build_row, probe_row) if build_left else (probe_row, build_row)
+        )
+        row = {**_qualify(left_name, left_row), **_qualify(right_name, right_row)}
+        if _row_matches(row, where_clause):
+            yield row
@@ -0,0 +1,248 @@
+# src/primitive_db/loader.py
+
+"""
+Массовая загрузка записей в таблицу из файлов CSV и JSONL.
+"""
+
+import csv
+import json
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from itertools import chain, islice
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .constants import LOAD_CHUNK_ROWS, LOAD_WORKERS
+from .core import _check_value_type, _next_id, clear_cache
+from .decorators import handle_db_errors, log_time, traced
+from .parser import _parse_value
+
+# Строка файла: (номер строки, сырое содержимое)
+RawLine = Tuple[int, Any]
+# Отклоненная строка: (номер строки, сырое содержимое, текст ошибки)
+Rejected = Tuple[int, Any, str]
+Row = Dict[str, Any]
+
+SUPPORTED_FORMATS = {".csv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl"}
+
+
+def _coerce_cell(col_name: str, expected_type: str, cell: str) -> Any:
+    """
+    Привести текстовую ячейку CSV к типу столбца.
+    Для str берется сама ячейка (кавычки снимаются как в _parse_value),
+    для int и bool используется _parse_value.
+    """
+    if expected_type == "str":
+        stripped = cell.strip()
+        if len(stripped) >= 2 and stripped[0] == stripped[-1] == '"':
+            return _parse_value(stripped)
+        return cell
+    value = _parse_value(cell)
+    _check_value_type(col_name, expected_type, value)
+    return value
+
+
+def _parse_chunk(
+        file_format: str,
+        schema: Dict[str, str],
+        header: List[str],
+        chunk: List[RawLine]
+) -> Tuple[List[Row], List[Rejected]]:
+    """
+    Разобрать и проверить по схеме пачку строк файла.
+    Выполняется в процессе-воркере, поэтому не трогает глобальное состояние.
+    """
+    non_id_columns = [name for name in schema if name != "ID"]
+    rows: List[Row] = []
+    rejected: List[Rejected] = []
+
+    for line_no, raw in chunk:
+        try:
+            if file_format == "csv":
+                if len(raw) != len(header):
+                    raise ValueError(
+                        f"Ожидается {len(header)} значений, получено {len(raw)}."
+                    )
+                cells = dict(zip(header, raw))
+                row = {
+                    name: _coerce_cell(name, schema[name], cells[name])
+                    for name in non_id_columns
+                }
+            else:
+                data = json.loads(raw)
+                if not isinstance(data, dict):
+                    raise ValueError("Ожидается JSON-объект.")
+                data.pop("ID", None)
+                missing = [name for name in non_id_columns if name not in data]
+                extra = [name for name in data if name not in schema]
+                if missing or extra:
+                    raise ValueError(
+                        f"Столбцы не совпадают со схемой: "
+                        f"нет {missing}, лишние {extra}."
+                    )
+                for name in non_id_columns:
+                    _check_value_type(name, schema[name], data[name])
+                row = {name: data[name] for name in non_id_columns}
+        except ValueError as exc:
+            rejected.append((line_no, raw, str(exc)))
+            continue
+        rows.append(row)
+
+    return rows, rejected
+
+
+def _read_csv_header(path: Path) -> List[str]:
+    """
+    Прочитать строку заголовка CSV файла.
+    """
+    with path.open("r", encoding="utf-8", newline="") as f:
+        return [name.strip() for name in next(csv.reader(f), [])]
+
+
+def _iter_chunks(
+        path: Path,
+        file_format: str,
+        chunk_rows: int
+) -> Iterator[List[RawLine]]:
+    """
+    Потоково читать файл пачками строк.
+    В памяти держится не больше одной пачки.
+    """
+    with path.open("r", encoding="utf-8", newline="") as f:
+        if file_format == "csv":
+            reader = csv.reader(f)
+            next(reader, None)
+            lines: Iterator[RawLine] = (
+                (reader.line_num, cells) for cells in reader if cells
+            )
+        else:
+            lines = (
+                (line_no, line.strip())
+                for line_no, line in enumerate(f, start=1)
+                if line.strip()
+            )
+
+        while True:
+            chunk = list(islice(lines, chunk_rows))
+            if not chunk:
+                return
+            yield chunk
+
+
+def _check_header(schema: Dict[str, str], header: List[str]) -> None:
+    """
+    Проверить, что заголовок CSV содержит все столбцы таблицы.
+    Столбец ID допускается, но игнорируется - ID назначаются заново.
+    """
+    expected = {name for name in schema if name != "ID"}
+    actual = {name for name in header if name != "ID"}
+    if expected != actual or len(header) != len(set(header)):
+        raise ValueError(
+            f"Заголовок CSV {header} не совпадает со столбцами таблицы "
+            f"{sorted(expected)}."
+        )
+
+
+def _write_rejected(rejected_path: Path, rejected: List[Rejected]) -> None:
+    """
+    Дописать отклоненные строки в файл в формате JSONL.
+    """
+    with rejected_path.open("a", encoding="utf-8") as f:
+        for line_no, raw, error in rejected:
+            record = {"line": line_no, "error": error, "raw": raw}
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+@log_time
+@handle_db_errors
+@traced("execute")
+def bulk_load(
+        metadata: Dict[str, Dict[str, str]],
+        table_name: str,
+        table_data: List[Row],
+        file_path: str,
+        chunk_rows: int = LOAD_CHUNK_ROWS,
+        workers: int = LOAD_WORKERS
+) -> Tuple[List[Row], int, int, Optional[Path]]:
+    """
+    Загрузить записи из CSV/JSONL файла в таблицу.
+    Пачки строк разбираются параллельно в пуле процессов, ID назначаются
+    подряд после максимального существующего. Возвращает данные таблицы
+    (новые строки добавлены в конец), число принятых и отклоненных строк
+    и путь к файлу отклоненных строк.
+    """
+    if table_name not in metadata:
+        raise ValueError(f'Таблица "{table_name}" не существует.')
+
+    path = Path(file_path)
+    if not path.is_file():
+        raise ValueError(f'Файл "{file_path}" не найден.')
+    file_format = SUPPORTED_FORMATS.get(path.suffix.lower())
+    if file_format is None:
+        raise ValueError(
+            f'Неподдерживаемый формат файла "{path.name}". '
+            f'Поддерживаются: {", ".join(sorted(SUPPORTED_FORMATS))}.'
+        )
+
+    schema = metadata[table_name]
+    header: List[str] = []
+    if file_format == "csv":
+        header = _read_csv_header(path)
+        _check_header(schema, header)
+    chunks = _iter_chunks(path, file_format, chunk_rows)
+    # Файл из одной пачки разбираем в этом процессе: запуск пула не окупается
+    head = list(islice(chunks, 2))
+    chunks = chain(head, chunks)
+
+    rejected_path = path.with_name(path.name + ".rejected")
+    if rejected_path.exists():
+        rejected_path.unlink()
+
+    # Пополняем копию списка: исходный могут читать по снимку
+    table_data = list(table_data)
+    next_id = _next_id(table_data)
+    accepted = 0
+    rejected_count = 0
+
+    def consume(result: Tuple[List[Row], List[Rejected]]) -> None:
+        nonlocal next_id, accepted, rejected_count
+        rows, rejected = result
+        new_rows = []
+        for row in rows:
+            new_rows.append({"ID": next_id, **row})
+            next_id += 1
+        table_data.extend(new_rows)
+        accepted += len(rows)
+        if rejected:
+            _write_rejected(rejected_path, rejected)
+            rejected_count += len(rejected)
+        print(
+            f"Обработано строк: {accepted + rejected_count} "
+            f"(принято {accepted}, отклонено {rejected_count})."
+        )
+
+    if workers <= 1 or len(head) < 2:
+        for chunk in chunks:
+            consume(_parse_chunk(file_format, schema, header, chunk))
+    else:
+        # Ограничиваем число пачек в работе, чтобы не читать весь файл в память
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            pending: deque[Future] = deque()
+            for chunk in chunks:
+                pending.append(
+                    executor.submit(
+                        _parse_chunk, file_format, schema, header, chunk
+                    )
+                )
+                if len(pending) >= workers * 2:
+                    consume(pending.popleft().result())
+            while pending:
+                consume(pending.popleft().result())
+
+    clear_cache()
+    return (
+        table_data,
+        accepted,
+        rejected_count,
+        rejected_path if rejected_count else None,
+    )
@@ -1,10 +1,13 @@
 # src/primitive_db/parser.py
 
-from typing import Any, Dict, List, Tuple
+import re
+from typing import Any, Dict, List, Optional, Tuple
 
 from .constants import VALID_TYPES
+from .decorators import traced
 
 
+@traced("parse")
 def _parse_column_defs(raw_columns: List[str]) -> List[Tuple[str, str]]:
     """
     Разбор аргументов формата <имя:тип>.
@@ -55,6 +58,7 @@ def _parse_value(raw: str) -> Any:
         raise ValueError(f"Не удалось распознать значение {raw!r}.") from exc
     
 
+@traced("parse")
 def _parse_values_list(text: str) -> List[Any]:
     """
     Разобрать список значений для insert
@@ -64,6 +68,7 @@ def _parse_values_list(text: str) -> List[Any]:
         raise ValueError("Список значений не может быть пустым.")
     return [_parse_value(part) for part in parts]
 
+@traced("parse")
 def _parse_where_clause(text: str) -> Dict[str, Any]:
     """
     Разобрать условие where
@@ -80,6 +85,7 @@ def _parse_where_clause(text: str) -> Dict[str, Any]:
     value = _parse_value(value_str)
     return {column: value}
 
+@traced("parse")
 def _parse_set_clause(text: str) -> Dict[str, Any]:
     """
     Разобрать выражение set
@@ -99,4 +105,66 @@ def _parse_set_clause(text: str) -> Dict[str, Any]:
         if not column:
             raise ValueError("Имя столбца в выражении set не может быть пустым.")
         result[column] = _parse_value(value_str)
-    return result
\ No newline at end of file
+    return result
+
+@traced("parse")
+def _parse_order_by(text: str) -> Tuple[str, bool]:
+    """
+    Разобрать выражение order by: <столбец> [asc|desc].
+    Возвращает имя столбца и признак обратного порядка.
+    """
+    parts = text.split()
+    if len(parts) not in (1, 2) or (
+        len(parts) == 2 and parts[1].lower() not in ("asc", "desc")
+    ):
+        raise ValueError(
+            'Некорректное выражение order by. Ожидается "<столбец> [asc|desc]".'
+        )
+    descending = len(parts) == 2 and parts[1].lower() == "desc"
+    return parts[0], descending
+
+@traced("parse")
+def _parse_limit(text: str) -> int:
+    """
+    Разобрать выражение limit
+    """
+    try:
+        limit = int(text.strip())
+    except ValueError as exc:
+        raise ValueError(
+            "Некорректное значение limit. Ожидается целое число."
+        ) from exc
+    if limit < 0:
+        raise ValueError("Значение limit не может быть отрицательным.")
+    return limit
+
+@traced("parse")
+def _parse_join(text: str) -> Optional[Tuple[str, str, str, str]]:
+    """
+    Разобрать соединение: <таблица1> join <таблица2> on <т1.столбец> = <т2.столбец>.
+    Возвращает (таблица1, таблица2, столбец1, столбец2) или None,
+    если соединения в тексте нет.
+    """
+    if not re.search(r"\sjoin\s", text, re.IGNORECASE):
+        return None
+
+    match = re.fullmatch(
+        r"\s*(\S+)\s+join\s+(\S+)\s+on\s+(\S+)\.(\S+)\s*=\s*(\S+)\.(\S+)\s*",
+        text,
+        re.IGNORECASE,
+    )
+    if not match:
+        raise ValueError(
+            "Некорректное соединение. Ожидается: <таблица1> join <таблица2> "
+            "on <таблица1>.<столбец> = <таблица2>.<столбец>."
+        )
+    left, right, first_table, first_col, second_table, second_col = match.groups()
+    if left == right:
+        raise ValueError("Соединение таблицы с самой собой не поддерживается.")
+
+    columns = {first_table: first_col, second_table: second_col}
+    if set(columns) != {left, right}:
+        raise ValueError(
+            f'Условие on должно ссылаться на таблицы "{left}" и "{right}".'
+        )
+    return left, right, columns[left], columns[right]
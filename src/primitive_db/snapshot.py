@@ -0,0 +1,163 @@
+# src/primitive_db/snapshot.py
+
+"""
+Снимки таблиц для изолированного чтения.
+
+Каждая версия таблицы - неизменяемый снимок: кортеж строк, которые никто
+не изменяет. Запись создает новую версию копированием при записи: функции
+core возвращают новый список, в котором переиспользуются неизмененные
+строки предыдущей версии. Читатель закрепляет снимок на всю команду и
+не видит частично выполненных изменений, а писатель не ждет читателей.
+Писатель записывает новую версию, только если таблица не изменилась
+с момента закрепления его снимка; иначе команда отклоняется.
+Вместе со снимком хранятся карты зон его строк для пропуска порций
+при сканировании.
+"""
+
+import itertools
+import threading
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from .core import upgrade_rows
+from .decorators import traced
+from .utils import (
+    load_table_data,
+    load_zone_map,
+    save_table_data,
+    save_zone_map,
+    table_file_stamp,
+    table_write_lock,
+)
+from .zonemap import Zone, build_zone_map
+
+Row = Dict[str, Any]
+TableOptions = Dict[str, Dict[str, Any]]
+# Ключ актуальности снимка: отпечаток файла и версия схемы
+SnapshotStamp = Tuple[Optional[Tuple[str, int, int, int]], int]
+
+
+class Snapshot(NamedTuple):
+    """
+    Неизменяемая версия таблицы.
+    """
+    table_name: str
+    version: int
+    rows: Tuple[Row, ...]
+    # Карты зон порций строк (см. zonemap)
+    zones: List[Zone]
+    # Отпечаток файла, из которого прочитана версия
+    stamp: SnapshotStamp
+
+
+_snapshots: Dict[str, Tuple[SnapshotStamp, Snapshot]] = {}
+# Короткая блокировка словаря снимков
+_snapshots_lock = threading.Lock()
+# Писатели одной таблицы выполняются по очереди: внутри процесса под этой
+# блокировкой, между процессами - под файловой блокировкой table_write_lock
+_write_locks: Dict[str, threading.Lock] = {}
+_versions = itertools.count(1)
+
+
+def _write_lock(table_name: str) -> threading.Lock:
+    with _snapshots_lock:
+        return _write_locks.setdefault(table_name, threading.Lock())
+
+
+def _stamp(options: TableOptions, table_name: str) -> SnapshotStamp:
+    schema_version = options.get(table_name, {}).get("version", 1)
+    return table_file_stamp(table_name), schema_version
+
+
+def _save_zones(table_name: str, stamp: SnapshotStamp, zones: List[Zone]) -> None:
+    file_stamp, schema_version = stamp
+    save_zone_map(table_name, {
+        "file": list(file_stamp) if file_stamp else None,
+        "schema_version": schema_version,
+        "chunks": zones,
+    })
+
+
+def _load_zones(
+        table_name: str,
+        stamp: SnapshotStamp,
+        rows: List[Row]
+) -> List[Zone]:
+    """
+    Взять карты зон из файла, если они построены по текущей версии данных,
+    иначе построить заново и сохранить.
+    """
+    file_stamp, schema_version = stamp
+    stored = load_zone_map(table_name)
+    if (
+        stored.get("file") == (list(file_stamp) if file_stamp else None)
+        and stored.get("schema_version") == schema_version
+        and isinstance(stored.get("chunks"), list)
+    ):
+        return stored["chunks"]
+
+    zones = build_zone_map(rows)
+    if file_stamp is not None:
+        _save_zones(table_name, stamp, zones)
+    return zones
+
+
+@traced("load")
+def pin_snapshot(options: TableOptions, table_name: str) -> Snapshot:
+    """
+    Закрепить текущую версию таблицы для чтения.
+    Если файл изменился (в том числе другим процессом) или изменилась
+    схема, загружается новая версия.
+    """
+    stamp = _stamp(options, table_name)
+    with _snapshots_lock:
+        cached = _snapshots.get(table_name)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+
+    rows = upgrade_rows(options, table_name, load_table_data(table_name))
+    zones = _load_zones(table_name, stamp, rows)
+    snapshot = Snapshot(table_name, next(_versions), tuple(rows), zones, stamp)
+    with _snapshots_lock:
+        _snapshots[table_name] = (stamp, snapshot)
+    return snapshot
+
+
+@traced("persist")
+def publish_snapshot(
+        options: TableOptions,
+        table_name: str,
+        rows: List[Row],
+        base: Snapshot,
+        compression: Optional[str] = None
+) -> Snapshot:
+    """
+    Записать новую версию таблицы, вычисленную из снимка base, и сделать
+    ее текущей. Если после закрепления base таблицу уже записал кто-то
+    другой (в том числе другой процесс), запись отклоняется, иначе его
+    изменения были бы потеряны. Уже закрепленные снимки остаются
+    неизменными.
+    """
+    with _write_lock(table_name), table_write_lock(table_name):
+        if table_file_stamp(table_name) != base.stamp[0]:
+            raise ValueError(
+                f'Таблица "{table_name}" была изменена другой командой. '
+                "Повторите команду."
+            )
+        zones = build_zone_map(rows, base.rows, base.zones)
+        save_table_data(table_name, rows, compression)
+        stamp = _stamp(options, table_name)
+        _save_zones(table_name, stamp, zones)
+        snapshot = Snapshot(
+            table_name, next(_versions), tuple(rows), zones, stamp
+        )
+        with _snapshots_lock:
+            _snapshots[table_name] = (stamp, snapshot)
+    return snapshot
+
+
+def invalidate_snapshot(table_name: str) -> None:
+    """
+    Забыть текущий снимок таблицы (например, после удаления таблицы).
+    """
+    with _snapshots_lock:
+        _snapshots.pop(table_name, None)
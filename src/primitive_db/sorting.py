@@ -0,0 +1,44 @@
+# src/primitive_db/sorting.py
+
+"""
+Сортировка результатов select (order by).
+
+С limit используется ограниченная куча (top-k), без limit - обычная
+сортировка в памяти: результат select и так целиком находится в памяти
+(строки берутся из снимка таблицы), поэтому временные файлы не экономят
+память, а только добавляют запись и чтение.
+"""
+
+import heapq
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional
+
+Row = Dict[str, Any]
+
+
+def _sort_key(column: str) -> Callable[[Row], Any]:
+    """
+    Ключ сортировки: значения None идут после остальных
+    (при обратном порядке - перед ними).
+    """
+    def key(row: Row) -> Any:
+        value = row.get(column)
+        return (value is None, value)
+
+    return key
+
+
+def order_rows(
+        rows: Iterable[Row],
+        column: str,
+        descending: bool = False,
+        limit: Optional[int] = None
+) -> Iterator[Row]:
+    """
+    Упорядочить строки по столбцу. Порядок строк с равными значениями
+    сохраняется.
+    """
+    key = _sort_key(column)
+    if limit is not None:
+        top = heapq.nlargest if descending else heapq.nsmallest
+        return iter(top(limit, rows, key=key))
+    return iter(sorted(rows, key=key, reverse=descending))
@@ -0,0 +1,188 @@
+# src/primitive_db/tracing.py
+
+"""
+Трассировка команд по фазам и журнал медленных запросов.
+
+Каждая команда REPL выполняется внутри трассы. Время делится между
+фазами parse, load, execute, persist и render: время вложенной фазы не
+учитывается во внешней, а время вне фаз попадает в "other". Кроме того
+считаются просмотренные строки и прочитанные/записанные байты.
+Команды дольше SLOW_QUERY_THRESHOLD_MS пишутся в журнал медленных
+запросов с ротацией файлов.
+"""
+
+import cProfile
+import logging
+import pstats
+import time
+import tracemalloc
+from contextlib import contextmanager
+from logging.handlers import RotatingFileHandler
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from .constants import (
+    PROFILE_TOP,
+    SLOW_QUERY_LOG,
+    SLOW_QUERY_LOG_BACKUPS,
+    SLOW_QUERY_LOG_MAX_BYTES,
+    SLOW_QUERY_THRESHOLD_MS,
+)
+
+PHASES = ("parse", "load", "execute", "persist", "render")
+COUNTERS = ("rows_scanned", "bytes_read", "bytes_written")
+
+
+class Trace:
+    """
+    Трасса одной команды.
+    """
+
+    def __init__(self, statement: str) -> None:
+        self.statement = statement
+        self.phases: Dict[str, float] = dict.fromkeys(PHASES + ("other",), 0.0)
+        self.counters: Dict[str, int] = dict.fromkeys(COUNTERS, 0)
+        self.total = 0.0
+        self._stack: List[str] = ["other"]
+        self._started = time.perf_counter()
+        self._mark = self._started
+
+    def _switch(self) -> None:
+        # Время с последнего переключения относим к текущей фазе
+        now = time.perf_counter()
+        self.phases[self._stack[-1]] += now - self._mark
+        self._mark = now
+
+    def enter(self, phase: str) -> None:
+        self._switch()
+        self._stack.append(phase)
+
+    def exit(self) -> None:
+        self._switch()
+        self._stack.pop()
+
+    def finish(self) -> None:
+        self._switch()
+        self.total = time.perf_counter() - self._started
+
+
+_state: Dict[str, Any] = {"trace": None, "inline": False, "slow_log": None}
+
+
+def set_inline(enabled: bool) -> None:
+    """
+    Включить или выключить вывод трассы после каждой команды.
+    """
+    _state["inline"] = enabled
+
+
+@contextmanager
+def span(phase: str) -> Iterator[None]:
+    """
+    Отнести время блока к фазе текущей трассы.
+    Без активной трассы ничего не делает.
+    """
+    trace: Optional[Trace] = _state["trace"]
+    if trace is None:
+        yield
+        return
+    trace.enter(phase)
+    try:
+        yield
+    finally:
+        trace.exit()
+
+
+def add_counter(name: str, value: int) -> None:
+    """
+    Увеличить счетчик текущей трассы.
+    """
+    trace: Optional[Trace] = _state["trace"]
+    if trace is not None:
+        trace.counters[name] += value
+
+
+def start_trace(statement: str) -> Trace:
+    trace = Trace(statement)
+    _state["trace"] = trace
+    return trace
+
+
+def format_trace(trace: Trace) -> str:
+    phases = " | ".join(
+        f"{phase} {seconds * 1000:.3f} мс" for phase, seconds in trace.phases.items()
+    )
+    counters = trace.counters
+    return (
+        f"Трассировка: всего {trace.total * 1000:.3f} мс | {phases}\n"
+        f"Строк просмотрено: {counters['rows_scanned']}, "
+        f"прочитано байт: {counters['bytes_read']}, "
+        f"записано байт: {counters['bytes_written']}"
+    )
+
+
+def _slow_log() -> logging.Logger:
+    logger = _state["slow_log"]
+    if logger is None:
+        logger = logging.getLogger("primitive_db.slow_queries")
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+        handler = RotatingFileHandler(
+            SLOW_QUERY_LOG,
+            maxBytes=SLOW_QUERY_LOG_MAX_BYTES,
+            backupCount=SLOW_QUERY_LOG_BACKUPS,
+            encoding="utf-8",
+        )
+        handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+        logger.addHandler(handler)
+        _state["slow_log"] = logger
+    return logger
+
+
+def finish_trace(trace: Trace) -> None:
+    """
+    Завершить трассу: вывести ее при включенной трассировке и записать
+    в журнал медленных запросов, если команда выполнялась дольше порога.
+    """
+    trace.finish()
+    _state["trace"] = None
+
+    if _state["inline"]:
+        print(format_trace(trace))
+
+    if trace.total * 1000 >= SLOW_QUERY_THRESHOLD_MS:
+        _slow_log().info(
+            "%s\n%s", trace.statement, format_trace(trace)
+        )
+
+
+def profile_statement(run: Callable[[], Any], top: int = PROFILE_TOP) -> Any:
+    """
+    Выполнить команду под cProfile и tracemalloc и вывести самые
+    затратные функции и места выделения памяти.
+    """
+    profiler = cProfile.Profile()
+    tracemalloc.start()
+    try:
+        result = profiler.runcall(run)
+        memory = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    stats = pstats.Stats(profiler)
+    hot = sorted(stats.stats.items(), key=lambda item: item[1][2], reverse=True)
+    print(f"Самые затратные функции (собственное время), топ {top}:")
+    for (filename, line, func), (_, calls, tottime, cumtime, _) in hot[:top]:
+        print(
+            f"  {tottime * 1000:10.3f} мс  (всего {cumtime * 1000:.3f} мс, "
+            f"вызовов {calls})  {func}  {filename}:{line}"
+        )
+
+    print(f"Пик памяти: {peak / 1024:.1f} КБ. Места выделения памяти, топ {top}:")
+    for stat in memory.statistics("lineno")[:top]:
+        frame = stat.traceback[0]
+        print(
+            f"  {stat.size / 1024:10.1f} КБ  (блоков {stat.count})  "
+            f"{frame.filename}:{frame.lineno}"
+        )
+    return result
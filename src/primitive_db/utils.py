@@ -5,14 +5,29 @@
 """
 
 import json
-from typing import Any, Dict, List
+import lzma
+import os
+import tempfile
+import time
+import zlib
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
 
-from .constants import DATA_DIR, METADATA_FILE
+try:
+    import fcntl
+except ImportError:  # не POSIX - блокировка только внутри процесса
+    fcntl = None
 
+from .compression import CODECS, encode_table, iter_blocks
+from .constants import DATA_DIR, METADATA_FILE, TABLE_OPTIONS_KEY
+from .decorators import traced
+from .tracing import add_counter
 
-def load_metadata() -> Dict[str, Dict[str, str]]:
+
+def _read_metadata_file() -> Dict[str, Any]:
     """
-    Загружаем метаданные базы данных из файла *.json.
+    Прочитать db_meta.json целиком.
     Если файла нет или он поврежден вернется пустой словарь.
     """
     if not METADATA_FILE.exists():
@@ -25,12 +40,22 @@ def load_metadata() -> Dict[str, Dict[str, str]]:
         #если файл битый или не читается - считаемб что БД пуста.
         return {}
     
-    #Гарантируем, что вернем ровно dict[str, dict[str, str]]
     if not isinstance(data, dict):
         return {}
+    return data
+
+def load_metadata() -> Dict[str, Dict[str, str]]:
+    """
+    Загружаем метаданные базы данных из файла *.json.
+    Если файла нет или он поврежден вернется пустой словарь.
+    """
+    data = _read_metadata_file()
     
+    #Гарантируем, что вернем ровно dict[str, dict[str, str]]
     result: Dict[str, Dict[str, str]] = {}
     for table_name, columns in data.items():
+        if table_name == TABLE_OPTIONS_KEY:
+            continue
         if isinstance(columns, dict):
             #Фильтруем только пары " имя ->  тип"
             result[table_name] = {
@@ -38,32 +63,114 @@ def load_metadata() -> Dict[str, Dict[str, str]]:
             }
     return result
 
-def save_metadata(metadata: Dict[str, Dict[str, str]]) -> None:
+def load_table_options() -> Dict[str, Dict[str, Any]]:
+    """
+    Загружаем настройки таблиц из служебного раздела db_meta.json.
+    """
+    options = _read_metadata_file().get(TABLE_OPTIONS_KEY)
+    if not isinstance(options, dict):
+        return {}
+    return {
+        str(table_name): table_options
+        for table_name, table_options in options.items()
+        if isinstance(table_options, dict)
+    }
+
+@traced("persist")
+def save_metadata(
+        metadata: Dict[str, Dict[str, str]],
+        options: Optional[Dict[str, Dict[str, Any]]] = None
+) -> None:
     """
     Сохраняем метаданные в json.
+    Если настройки таблиц не переданы, сохраняются уже записанные в файле.
+    Настройки удаленных таблиц отбрасываются.
     """
+    if options is None:
+        options = load_table_options()
+
+    data: Dict[str, Any] = dict(metadata)
+    table_options = {
+        name: value for name, value in options.items() if name in metadata
+    }
+    if table_options:
+        data[TABLE_OPTIONS_KEY] = table_options
+
     with METADATA_FILE.open("w", encoding="utf-8")  as f:
-        json.dump(metadata, f, ensure_ascii=False, indent=2)
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    add_counter("bytes_written", METADATA_FILE.stat().st_size)
+
+def _table_path(table_name: str) -> Path:
+    return DATA_DIR / f"{table_name}.json"
+
+def _compressed_table_path(table_name: str) -> Path:
+    return DATA_DIR / f"{table_name}.pdb"
+
+def _zone_map_path(table_name: str) -> Path:
+    return DATA_DIR / f"{table_name}.zones.json"
+
+def _lock_path(table_name: str) -> Path:
+    return DATA_DIR / f"{table_name}.lock"
+
+@contextmanager
+def table_write_lock(table_name: str) -> Iterator[None]:
+    """
+    Межпроцессная блокировка записи таблицы на файле data/<имя>.lock.
+    """
+    if fcntl is None:
+        yield
+        return
+    DATA_DIR.mkdir(exist_ok=True)
+    with _lock_path(table_name).open("a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
 
 def delete_table_data(table_name: str) -> None:
     """
-    Удаляет json файл содержимого таблицы, если удаляется сама таблица.
+    Удаляет файл содержимого таблицы, если удаляется сама таблица.
     """
-    table_path = DATA_DIR / f"{table_name}.json"
-    if table_path.exists():
-        table_path.unlink()
+    for table_path in (
+        _table_path(table_name),
+        _compressed_table_path(table_name),
+        _zone_map_path(table_name),
+        _lock_path(table_name),
+    ):
+        if table_path.exists():
+            table_path.unlink()
 
 def load_table_data(table_name: str) -> List[Dict[str, Any]]:
     """
-    Загружаем данные таблицы из файла *.json.
+    Загружаем данные таблицы из файла *.json или сжатого *.pdb.
     Если файйа нет или он поврежден возвращаем пустой список.
     """
-    path = DATA_DIR / f"{table_name}.json"
+    compressed_path = _compressed_table_path(table_name)
+    if compressed_path.exists():
+        try:
+            add_counter("bytes_read", compressed_path.stat().st_size)
+            return [row for block in iter_blocks(compressed_path) for row in block]
+        except (
+            ValueError,
+            KeyError,
+            IndexError,
+            TypeError,
+            OSError,
+            zlib.error,
+            lzma.LZMAError,
+        ):
+            # Структура блоков не проверяется заранее - повреждение внутри
+            # блока проявляется как ошибка разбора
+            return []
+
+    path = _table_path(table_name)
 
     if not path.exists():
         return []
 
     try:
+        add_counter("bytes_read", path.stat().st_size)
         with path.open("r", encoding="utf-8") as f:
             data: Any = json.load(f)
     except (json.JSONDecodeError, OSError):
@@ -78,13 +185,103 @@ def load_table_data(table_name: str) -> List[Dict[str, Any]]:
             result.append(row)
     return result
 
-def save_table_data(table_name: str, data: List[Dict[str, Any]]) -> None:
+def table_file_stamp(table_name: str) -> Optional[Tuple[str, int, int, int]]:
+    """
+    Отпечаток файла таблицы (имя, inode, размер, время изменения).
+    Меняется при каждой записи таблицы; None, если файла нет.
     """
-    Сохраняем данные таблицы в файл json
+    for path in (_compressed_table_path(table_name), _table_path(table_name)):
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue
+        return path.name, stat.st_ino, stat.st_size, stat.st_mtime_ns
+    return None
+
+def _replace_file(path: Path, write: Callable[[Path], None]) -> None:
+    """
+    Атомарно заменить файл: пишем во временный файл и переименовываем.
+    Читатель всегда видит либо старую, либо новую версию целиком.
+    У каждого писателя свой временный файл, поэтому одновременные записи
+    из разных процессов не портят друг другу данные.
+    """
+    fd, tmp_name = tempfile.mkstemp(
+        prefix=path.name + ".", suffix=".tmp", dir=path.parent
+    )
+    os.close(fd)
+    tmp_path = Path(tmp_name)
+    try:
+        write(tmp_path)
+        # mkstemp создает файл с правами 0600
+        os.chmod(tmp_path, 0o644)
+        # Время изменения с точностью до наносекунд: по нему (вместе
+        # с inode и размером) писатели проверяют, что файл не изменился
+        now = time.time_ns()
+        os.utime(tmp_path, ns=(now, now))
+        add_counter("bytes_written", tmp_path.stat().st_size)
+        os.replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+def save_table_data(
+        table_name: str,
+        data: List[Dict[str, Any]],
+        compression: Optional[str] = None
+) -> None:
+    """
+    Сохраняем данные таблицы в файл json или, если задано сжатие
+    (zlib/lzma), в сжатый файл *.pdb. Файл другого формата удаляется.
+    """
+    if not DATA_DIR.exists():
+        DATA_DIR.mkdir()
+
+    path = _table_path(table_name)
+    compressed_path = _compressed_table_path(table_name)
+
+    if compression in CODECS:
+        _replace_file(
+            compressed_path,
+            lambda tmp: tmp.write_bytes(encode_table(data, compression)),
+        )
+        stale_path = path
+    else:
+        def write_json(tmp: Path) -> None:
+            with tmp.open("w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+
+        _replace_file(path, write_json)
+        stale_path = compressed_path
+
+    if stale_path.exists():
+        stale_path.unlink()
+
+def load_zone_map(table_name: str) -> Dict[str, Any]:
+    """
+    Загружаем карты зон таблицы из файла *.zones.json.
+    Если файла нет или он поврежден возвращаем пустой словарь.
+    """
+    path = _zone_map_path(table_name)
+    if not path.exists():
+        return {}
+
+    try:
+        add_counter("bytes_read", path.stat().st_size)
+        with path.open("r", encoding="utf-8") as f:
+            data: Any = json.load(f)
+    except (json.JSONDecodeError, OSError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+def save_zone_map(table_name: str, zone_map: Dict[str, Any]) -> None:
+    """
+    Сохраняем карты зон таблицы рядом с ее данными.
     """
     if not DATA_DIR.exists():
         DATA_DIR.mkdir()
 
-    path = DATA_DIR / f"{table_name}.json"
-    with path.open("w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
\ No newline at end of file
+    def write_json(tmp: Path) -> None:
+        with tmp.open("w", encoding="utf-8") as f:
+            json.dump(zone_map, f, ensure_ascii=False)
+
+    _replace_file(_zone_map_path(table_name), write_json)
@@ -0,0 +1,236 @@
+# src/primitive_db/vectorized.py
+
+"""
+Векторизованное сканирование на NumPy.
+
+Если NumPy установлен, столбцы снимка таблицы загружаются в массивы:
+int и bool - как есть, str - как целочисленные коды (словарь значений
+отсортирован, поэтому порядок кодов совпадает с порядком строк).
+Условие where вычисляется как булева маска, агрегаты - на массивах.
+Массивы строятся только для столбцов, нужных запросу, и только начиная
+с VECTORIZED_MIN_QUERIES-го запроса к снимку: сборка массива дороже
+одного сканирования, а после записи обычно следует один запрос.
+Если NumPy нет или столбец нельзя представить массивом (смешанные типы,
+числа вне int64), функции возвращают None и используется обычный путь.
+"""
+
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, List, NamedTuple, Optional
+
+try:
+    import numpy as np
+except ImportError:  # NumPy не обязателен
+    np = None
+
+from .constants import VECTORIZED_CACHE_SIZE, VECTORIZED_MIN_QUERIES
+
+AVAILABLE = np is not None
+
+Row = Dict[str, Any]
+
+_INT64_MIN = -(2 ** 63)
+_INT64_MAX = 2 ** 63 - 1
+
+
+class Column(NamedTuple):
+    """
+    Столбец в виде массивов NumPy.
+    """
+    kind: str
+    values: Any
+    valid: Any
+    # Для str: отсортированный словарь значений и обратный индекс
+    uniques: Optional[List[str]] = None
+    codes: Optional[Dict[str, int]] = None
+
+
+class ColumnStore:
+    """
+    Массивы столбцов одного снимка, собираемые по мере надобности.
+    """
+
+    def __init__(self, rows: int) -> None:
+        self.rows = rows
+        # None - столбец нельзя представить массивом
+        self.columns: Dict[str, Optional[Column]] = {}
+        self.queries = 0
+
+
+_stores: "OrderedDict[Hashable, ColumnStore]" = OrderedDict()
+
+
+def _build_column(values: List[Any]) -> Optional[Column]:
+    count = len(values)
+    present = [value for value in values if value is not None]
+    valid = np.fromiter((value is not None for value in values), bool, count)
+
+    if all(isinstance(value, bool) for value in present):
+        array = np.fromiter((value is True for value in values), bool, count)
+        return Column("bool", array, valid)
+
+    if all(
+        isinstance(value, int) and not isinstance(value, bool)
+        for value in present
+    ):
+        if present and (min(present) < _INT64_MIN or max(present) > _INT64_MAX):
+            return None
+        array = np.fromiter(
+            (0 if value is None else value for value in values), np.int64, count
+        )
+        return Column("int", array, valid)
+
+    if all(isinstance(value, str) for value in present):
+        uniques = sorted(set(present))
+        codes = {value: code for code, value in enumerate(uniques)}
+        array = np.fromiter(
+            (-1 if value is None else codes[value] for value in values),
+            np.int64,
+            count,
+        )
+        return Column("str", array, valid, uniques, codes)
+
+    return None
+
+
+def _column_store(
+        snapshot_key: Hashable,
+        table_data: List[Row],
+        names: Iterable[str]
+) -> Optional[ColumnStore]:
+    """
+    Массивы нужных запросу столбцов снимка. Снимок неизменяем, поэтому
+    массив столбца строится один раз и кешируется по ключу снимка.
+    Возвращает None, если недостающие массивы строить еще рано.
+    """
+    store = _stores.get(snapshot_key)
+    if store is not None and store.rows == len(table_data):
+        _stores.move_to_end(snapshot_key)
+    else:
+        store = ColumnStore(len(table_data))
+        _stores[snapshot_key] = store
+        while len(_stores) > VECTORIZED_CACHE_SIZE:
+            _stores.popitem(last=False)
+    store.queries += 1
+
+    missing = [name for name in dict.fromkeys(names) if name not in store.columns]
+    if missing and store.queries < VECTORIZED_MIN_QUERIES:
+        return None
+    for name in missing:
+        # Столбца может не быть в строках - тогда он целиком из None
+        store.columns[name] = _build_column([row.get(name) for row in table_data])
+    return store
+
+
+def _equals_mask(column: Column, value: Any) -> Optional[Any]:
+    """
+    Маска строк, где столбец равен value (с семантикой Python ==).
+    """
+    if value is None:
+        return ~column.valid
+    if column.kind == "str":
+        code = column.codes.get(value) if isinstance(value, str) else None
+        if code is None:
+            return np.zeros(len(column.values), bool)
+        return column.values == code
+    if isinstance(value, str):
+        return np.zeros(len(column.values), bool)
+    if not isinstance(value, int) or not _INT64_MIN <= value <= _INT64_MAX:
+        return None
+    if column.kind == "int":
+        return column.valid & (column.values == value)
+    # bool: True == 1 и False == 0, остальные числа не равны ни одному
+    if value == 1:
+        return column.valid & column.values
+    if value == 0:
+        return column.valid & ~column.values
+    return np.zeros(len(column.values), bool)
+
+
+def _where_mask(
+        store: ColumnStore,
+        where_clause: Optional[Dict[str, Any]]
+) -> Optional[Any]:
+    mask = np.ones(store.rows, bool)
+    for col, value in (where_clause or {}).items():
+        column = store.columns[col]
+        if column is None:
+            return None
+        col_mask = _equals_mask(column, value)
+        if col_mask is None:
+            return None
+        mask &= col_mask
+    return mask
+
+
+def filter_rows(
+        snapshot_key: Hashable,
+        table_data: List[Row],
+        where_clause: Dict[str, Any]
+) -> Optional[List[Row]]:
+    """
+    Отобрать строки по условию where масками NumPy.
+    Возвращает None, если векторный путь неприменим.
+    """
+    if not AVAILABLE:
+        return None
+    store = _column_store(snapshot_key, table_data, where_clause)
+    if store is None:
+        return None
+    mask = _where_mask(store, where_clause)
+    if mask is None:
+        return None
+    return [table_data[i] for i in np.flatnonzero(mask).tolist()]
+
+
+def aggregate(
+        snapshot_key: Hashable,
+        table_data: List[Row],
+        column: str,
+        where_clause: Optional[Dict[str, Any]]
+) -> Optional[Dict[str, Any]]:
+    """
+    Посчитать count/sum/min/max столбца по строкам, подходящим под where.
+    Результат совпадает с core.aggregate; None - векторный путь неприменим.
+    """
+    if not AVAILABLE:
+        return None
+    store = _column_store(
+        snapshot_key, table_data, [*(where_clause or {}), column]
+    )
+    if store is None:
+        return None
+    mask = _where_mask(store, where_clause)
+    if mask is None:
+        return None
+    col = store.columns[column]
+    if col is None:
+        return None
+
+    selected = col.values[mask & col.valid]
+    count = int(selected.size)
+    if count == 0:
+        return {"count": 0, "sum": None, "min": None, "max": None}
+
+    if col.kind == "str":
+        return {
+            "count": count,
+            "sum": None,
+            "min": col.uniques[int(selected.min())],
+            "max": col.uniques[int(selected.max())],
+        }
+
+    if col.kind == "bool":
+        return {
+            "count": count,
+            "sum": int(np.count_nonzero(selected)),
+            "min": bool(selected.min()),
+            "max": bool(selected.max()),
+        }
+
+    low, high = int(selected.min()), int(selected.max())
+    if max(abs(low), abs(high)) * count <= _INT64_MAX:
+        total = int(selected.sum())
+    else:
+        # Сумма может не поместиться в int64 - считаем в Python
+        total = sum(selected.tolist())
+    return {"count": count, "sum": total, "min": low, "max": high}
@@ -0,0 +1,193 @@
+# src/primitive_db/zonemap.py
+
+"""
+Карты зон для пропуска данных при сканировании.
+
+Строки таблицы делятся на порции по ZONE_CHUNK_ROWS. Для каждой порции
+и каждого столбца хранится краткая сводка:
+    int  - минимум и максимум;
+    bool - число значений True и False;
+    str  - фильтр Блума по значениям;
+а также число пустых значений (None или отсутствующий столбец).
+По сводке можно понять, что в порции точно нет строк, подходящих под
+условие where, и не проверять такие строки.
+"""
+
+import base64
+import hashlib
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from .constants import BLOOM_BITS_PER_VALUE, BLOOM_HASHES, ZONE_CHUNK_ROWS
+
+Row = Dict[str, Any]
+Zone = Dict[str, Any]
+
+
+def _bloom_positions(value: str, bits: int) -> Iterator[int]:
+    """
+    Позиции битов значения (двойное хеширование).
+    """
+    data = value.encode("utf-8", "surrogatepass")
+    digest = hashlib.blake2b(data, digest_size=16).digest()
+    h1 = int.from_bytes(digest[:8], "little")
+    h2 = int.from_bytes(digest[8:], "little") | 1
+    for i in range(BLOOM_HASHES):
+        yield (h1 + i * h2) % bits
+
+
+def _build_bloom(values: set) -> Dict[str, Any]:
+    bits = max(64, len(values) * BLOOM_BITS_PER_VALUE)
+    bloom = bytearray((bits + 7) // 8)
+    for value in values:
+        for pos in _bloom_positions(value, bits):
+            bloom[pos >> 3] |= 1 << (pos & 7)
+    return {"bits": bits, "bloom": base64.b64encode(bloom).decode("ascii")}
+
+
+def _bloom_may_contain(summary: Dict[str, Any], value: str) -> bool:
+    bloom = base64.b64decode(summary["bloom"])
+    return all(
+        bloom[pos >> 3] & (1 << (pos & 7))
+        for pos in _bloom_positions(value, summary["bits"])
+    )
+
+
+def _summarize(values: List[Any], rows: int) -> Dict[str, Any]:
+    """
+    Сводка по значениям одного столбца в порции.
+    """
+    present = [value for value in values if value is not None]
+    summary: Dict[str, Any] = {"nulls": rows - len(present)}
+    if not present:
+        summary["kind"] = "null"
+    elif all(isinstance(value, bool) for value in present):
+        true_count = sum(present)
+        summary.update(
+            kind="bool", true=true_count, false=len(present) - true_count
+        )
+    elif all(
+        isinstance(value, int) and not isinstance(value, bool)
+        for value in present
+    ):
+        summary.update(kind="int", min=min(present), max=max(present))
+    elif all(isinstance(value, str) for value in present):
+        summary.update(kind="str", **_build_bloom(set(present)))
+    else:
+        summary["kind"] = "mixed"
+    return summary
+
+
+def _build_zone(chunk: List[Row]) -> Zone:
+    columns = dict.fromkeys(col for row in chunk for col in row)
+    return {
+        "rows": len(chunk),
+        "columns": {
+            col: _summarize([row.get(col) for row in chunk], len(chunk))
+            for col in columns
+        },
+    }
+
+
+def build_zone_map(
+        table_data: Sequence[Row],
+        previous_rows: Optional[Sequence[Row]] = None,
+        previous_zones: Optional[List[Zone]] = None
+) -> List[Zone]:
+    """
+    Построить карты зон для всех порций таблицы.
+    Если переданы строки и карты зон предыдущей версии, сводки порций,
+    состоящих из тех же объектов строк (копирование при записи их не
+    меняет), берутся из предыдущей версии. При добавлении строк в конец
+    пересчитывается только последняя порция.
+    """
+    if (
+        previous_rows is None
+        or previous_zones is None
+        or sum(zone["rows"] for zone in previous_zones) != len(previous_rows)
+    ):
+        previous_rows, previous_zones = (), []
+
+    zones: List[Zone] = []
+    for index, start in enumerate(range(0, len(table_data), ZONE_CHUNK_ROWS)):
+        chunk = table_data[start:start + ZONE_CHUNK_ROWS]
+        if (
+            index < len(previous_zones)
+            and previous_zones[index]["rows"] == len(chunk)
+            and all(
+                row is old_row
+                for row, old_row in zip(
+                    chunk, previous_rows[start:start + len(chunk)]
+                )
+            )
+        ):
+            zones.append(previous_zones[index])
+        else:
+            zones.append(_build_zone(list(chunk)))
+    return zones
+
+
+def _value_may_match(summary: Optional[Dict[str, Any]], value: Any) -> bool:
+    """
+    Может ли в порции быть строка, где столбец равен value.
+    Проверка консервативна: True, если исключить порцию нельзя.
+    """
+    if summary is None:
+        # Столбца нет ни в одной строке порции - везде None
+        return value is None
+    if value is None:
+        return summary["nulls"] > 0
+
+    kind = summary["kind"]
+    if kind == "null":
+        return False
+    if kind == "mixed":
+        return True
+    if kind == "str":
+        return isinstance(value, str) and _bloom_may_contain(summary, value)
+    if isinstance(value, str):
+        return False
+    if not isinstance(value, int):
+        return True
+    if kind == "int":
+        return summary["min"] <= value <= summary["max"]
+    # bool: True == 1 и False == 0, остальные числа не равны ни одному
+    if value == 1:
+        return summary["true"] > 0
+    if value == 0:
+        return summary["false"] > 0
+    return False
+
+
+def chunk_may_match(zone: Zone, where_clause: Dict[str, Any]) -> bool:
+    """
+    Может ли в порции быть строка, удовлетворяющая условию where.
+    """
+    columns = zone["columns"]
+    return all(
+        _value_may_match(columns.get(col), value)
+        for col, value in where_clause.items()
+    )
+
+
+def scan_ranges(
+        row_count: int,
+        where_clause: Optional[Dict[str, Any]],
+        zones: Optional[List[Zone]]
+) -> Iterator[Tuple[int, int, bool]]:
+    """
+    Разбить таблицу на диапазоны (начало, конец, нужно_проверять).
+    Без условия или без актуальных карт зон - один диапазон на всю таблицу.
+    """
+    if (
+        not where_clause
+        or zones is None
+        or sum(zone["rows"] for zone in zones) != row_count
+    ):
+        yield 0, row_count, True
+        return
+
+    start = 0
+    for zone in zones:
+        end = start + zone["rows"]
+        yield start, end, chunk_may_match(zone, where_clause)
+        start = end